@@ -1,26 +1,48 @@
 #!/usr/bin/env python3
 """A github org client
 """
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from typing import (
+    Iterator,
     List,
     Dict,
+    Union,
 )
 
 from utils import (
     get_json,
+    get_json_page,
     access_nested_map,
     memoize,
 )
 
 
+def _page_url(url: str, page: int) -> str:
+    """`url` with its `page` query parameter set to `page`"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _last_page(url: str) -> int:
+    """Page number in a `Link: rel="last"` URL"""
+    return int(dict(parse_qsl(urlsplit(url).query)).get("page", 1))
+
+
 class GithubOrgClient:
     """A Githib org client
     """
     ORG_URL = "https://api.github.com/orgs/{org}"
 
-    def __init__(self, org_name: str) -> None:
-        """Init method of GithubOrgClient"""
+    def __init__(self, org_name: str, page_workers: int = 4) -> None:
+        """Init method of GithubOrgClient
+
+        `page_workers` bounds how many repos pages are fetched at once.
+        """
         self._org_name = org_name
+        self._page_workers = page_workers
 
     @memoize
     def org(self) -> Dict:
@@ -33,12 +55,48 @@ class GithubOrgClient:
         return self.org["repos_url"]
 
     @memoize
-    def repos_payload(self) -> Dict:
-        """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+    def repos_payload(self) -> List[Dict]:
+        """Memoize repos payload, every page of it"""
+        return [repo for page in self._repos_pages() for repo in page]
 
-    def public_repos(self, license: str = None) -> List[str]:
-        """Public repos"""
+    def _repos_pages(self) -> Iterator[List[Dict]]:
+        """Yield each page of repos in order, as soon as it is available.
+
+        The first page's `Link` header gives the last page; the rest are
+        fetched concurrently on at most `page_workers` threads. Without a
+        `last` link, `next` links are followed one at a time.
+        """
+        page, links = get_json_page(self._public_repos_url)
+        yield page
+        if "last" in links:
+            last_url = links["last"]["url"]
+            urls = [
+                _page_url(last_url, number)
+                for number in range(2, _last_page(last_url) + 1)
+            ]
+            if not urls:
+                return
+            workers = min(self._page_workers, len(urls))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # map() yields results in page order as they complete
+                yield from pool.map(get_json, urls)
+            return
+        while "next" in links:
+            page, links = get_json_page(links["next"]["url"])
+            yield page
+
+    def public_repos(
+        self,
+        license: str = None,
+        stream: bool = False,
+    ) -> Union[List[str], Iterator[str]]:
+        """Public repos
+
+        With `stream=True`, returns an iterator that yields names page by
+        page as pages arrive; once exhausted, `repos_payload` is cached.
+        """
+        if stream:
+            return self._stream_repos(license)
         json_payload = self.repos_payload
         public_repos = [
             repo["name"] for repo in json_payload
@@ -47,6 +105,20 @@ class GithubOrgClient:
 
         return public_repos
 
+    def _stream_repos(self, license: str = None) -> Iterator[str]:
+        """Generator behind public_repos(stream=True)"""
+        if hasattr(self, "_repos_payload"):
+            pages = iter([self._repos_payload])
+        else:
+            pages = self._repos_pages()
+        payload = []
+        for page in pages:
+            payload.extend(page)
+            for repo in page:
+                if license is None or self.has_license(repo, license):
+                    yield repo["name"]
+        self._repos_payload = payload
+
     @staticmethod
     def has_license(repo: Dict[str, Dict], license_key: str) -> bool:
         """Static: has_license"""
@@ -8,6 +8,7 @@ from parameterized import parameterized, parameterized_class
 from client import GithubOrgClient
 from typing import Dict
 import requests
+import threading
 
 from unittest.mock import PropertyMock
 
@@ -72,10 +73,10 @@ class TestGithubOrgClient(unittest.TestCase):
             # Assert that the 'org' property was accessed
             mock_org.assert_called_once()
 
-    @patch('client.get_json')
+    @patch('client.get_json_page')
     def test_public_repos(self, mock_get_json: Mock) -> None:
         """
-        Tests the `public_repos` method by mocking `get_json` and
+        Tests the `public_repos` method by mocking `get_json_page` and
         `_public_repos_url`.
         """
         # Define a sample payload for the repos API call
@@ -84,8 +85,8 @@ class TestGithubOrgClient(unittest.TestCase):
             {"name": "repo-two"},
             {"name": "repo-three"},
         ]
-        # Configure the mock for get_json to return the sample payload
-        mock_get_json.return_value = repos_payload
+        # A single page: the sample payload and no Link header
+        mock_get_json.return_value = (repos_payload, {})
 
         # Define the expected list of repository names
         expected_repos = ["repo-one", "repo-two", "repo-three"]
@@ -127,6 +128,118 @@ class TestGithubOrgClient(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestGithubOrgClientPagination(unittest.TestCase):
+    """
+    Test suite for fetching every page of `repos_payload`.
+    """
+    REPOS_URL = "https://api.github.com/orgs/big/repos"
+
+    def setUp(self) -> None:
+        """
+        Patch `_public_repos_url` and build three pages of repos.
+        """
+        self.pages = [
+            [{"name": "repo-{}-{}".format(page, i)} for i in range(2)]
+            for page in range(1, 4)
+        ]
+        patcher = patch.object(
+            GithubOrgClient,
+            '_public_repos_url',
+            new_callable=PropertyMock,
+            return_value=self.REPOS_URL
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page_url(self, page: int) -> str:
+        """URL of one page, as GitHub writes it in the Link header"""
+        return "{}?per_page=2&page={}".format(self.REPOS_URL, page)
+
+    @patch('client.get_json')
+    @patch('client.get_json_page')
+    def test_repos_payload_all_pages(
+        self,
+        mock_get_json_page: Mock,
+        mock_get_json: Mock
+    ) -> None:
+        """
+        Tests that the remaining pages are fetched from the `last` link
+        and joined in page order, even when they complete out of order.
+        """
+        mock_get_json_page.return_value = (self.pages[0], {
+            "next": {"url": self.page_url(2)},
+            "last": {"url": self.page_url(3)},
+        })
+        finished = threading.Event()
+
+        def get_json_side_effect(url: str):
+            """Page 2 only returns after page 3 has been fetched"""
+            if url == self.page_url(2):
+                finished.wait(1)
+                return self.pages[1]
+            finished.set()
+            return self.pages[2]
+        mock_get_json.side_effect = get_json_side_effect
+
+        client = GithubOrgClient("big")
+        self.assertEqual(
+            client.repos_payload,
+            self.pages[0] + self.pages[1] + self.pages[2]
+        )
+        mock_get_json_page.assert_called_once_with(self.REPOS_URL)
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_get_json.call_args_list),
+            [self.page_url(2), self.page_url(3)]
+        )
+
+    @patch('client.get_json_page')
+    def test_repos_payload_follows_next(
+        self,
+        mock_get_json_page: Mock
+    ) -> None:
+        """
+        Tests that `next` links are followed when there is no `last`.
+        """
+        mock_get_json_page.side_effect = [
+            (self.pages[0], {"next": {"url": self.page_url(2)}}),
+            (self.pages[1], {}),
+        ]
+        client = GithubOrgClient("big")
+        self.assertEqual(client.repos_payload, self.pages[0] + self.pages[1])
+        mock_get_json_page.assert_called_with(self.page_url(2))
+
+    @patch('client.get_json')
+    @patch('client.get_json_page')
+    def test_public_repos_stream(
+        self,
+        mock_get_json_page: Mock,
+        mock_get_json: Mock
+    ) -> None:
+        """
+        Tests that streamed names start before later pages are fetched
+        and that the full payload is cached afterwards.
+        """
+        mock_get_json_page.return_value = (self.pages[0], {
+            "last": {"url": self.page_url(3)},
+        })
+        mock_get_json.side_effect = lambda url: self.pages[
+            int(url[-1]) - 1
+        ]
+
+        client = GithubOrgClient("big")
+        names = client.public_repos(stream=True)
+        self.assertEqual(next(names), "repo-1-0")
+        mock_get_json.assert_not_called()
+        self.assertEqual(
+            list(names),
+            ["repo-1-1", "repo-2-0", "repo-2-1", "repo-3-0", "repo-3-1"]
+        )
+
+        self.assertEqual(len(client.public_repos()), 6)
+        mock_get_json_page.assert_called_once()
+        self.assertEqual(mock_get_json.call_count, 2)
+
+
 @parameterized_class(
     ('org_payload', 'repos_payload', 'expected_repos', 'apache2_repos'),
     TEST_PAYLOAD
@@ -138,12 +251,13 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
         """
-        Set up the class by patching `requests.get` to return fixture data.
+        Set up the class by patching the shared session's `get` to
+        return fixture data.
         """
-        # Define the side effect for requests.get based on the URL
-        def requests_get_side_effect(url: str):
+        # Define the side effect for Session.get based on the URL
+        def requests_get_side_effect(url: str, **kwargs):
             """
-            Side effect function to mock `requests.get`.
+            Side effect function to mock `requests.Session.get`.
             Returns a mock response with a json method that provides the
             appropriate fixture payload based on the requested URL.
             """
@@ -162,10 +276,12 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
             # Create a mock response object
             mock_response = Mock()
             mock_response.json.return_value = payload
+            mock_response.content = b""
+            mock_response.links = {}
             return mock_response
 
-        # Start the patcher for requests.get
-        cls.get_patcher = patch('requests.get')
+        # Start the patcher for requests.Session.get
+        cls.get_patcher = patch('requests.Session.get')
         mock_get = cls.get_patcher.start()
         mock_get.side_effect = requests_get_side_effect
 
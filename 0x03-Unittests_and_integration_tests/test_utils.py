@@ -8,8 +8,16 @@ from parameterized import parameterized
 
 from utils import access_nested_map
 
+import os
+import json
+import shutil
+import tempfile
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, Mock
-from utils import get_json
+from utils import get_json, get_session, configure_session, HTTPSession
+from utils import HTTPCache
 
 from utils import memoize
 
@@ -59,7 +67,7 @@ class TestGetJson(unittest.TestCase):
         ("http://example.com", {"payload": True}),
         ("http://holberton.io", {"payload": False}),
     ])
-    @patch('utils.requests.get')
+    @patch('utils.requests.Session.get')
     def test_get_json(
         self,
         test_url: str,
@@ -72,20 +80,306 @@ class TestGetJson(unittest.TestCase):
         """
         # Configure the mock's return value
         mock_get.return_value.json.return_value = test_payload
+        mock_get.return_value.content = b"{}"
 
         # Call the function under test
         result = get_json(test_url)
 
         """
         Assert that the mocked get method was called once with
-        the correct URL
+        the correct URL and the session's timeouts
         """
-        mock_get.assert_called_once_with(test_url)
+        mock_get.assert_called_once_with(
+            test_url, timeout=get_session().timeout
+        )
 
         # Assert that the output of get_json is equal to the test_payload
         self.assertEqual(result, test_payload)
 
 
+class TestHTTPSession(unittest.TestCase):
+    """
+    Test suite for the shared `HTTPSession` layer.
+    """
+    def test_get_session_is_shared(self) -> None:
+        """
+        Tests that `get_session` hands every caller the same session.
+        """
+        self.assertIs(get_session(), get_session())
+
+    def test_configure_session(self) -> None:
+        """
+        Tests that `configure_session` applies pool size, timeouts and
+        retries to the shared session.
+        """
+        original = get_session()
+        try:
+            session = configure_session(
+                pool_size=4, connect_timeout=1, read_timeout=2, retries=5
+            )
+            self.assertIs(get_session(), session)
+            self.assertEqual(session.timeout, (1, 2))
+            adapter = session._session.get_adapter("https://example.com")
+            self.assertEqual(adapter._pool_maxsize, 4)
+            self.assertEqual(adapter.max_retries.total, 5)
+        finally:
+            configure_session()
+        self.assertIsNot(get_session(), original)
+
+    @patch('utils.requests.Session.get')
+    def test_metrics(self, mock_get: Mock) -> None:
+        """
+        Tests that latency, response size and errors are recorded.
+        """
+        session = HTTPSession()
+        mock_get.return_value.content = b"12345"
+        session.get("http://example.com")
+        session.get("http://example.com")
+
+        mock_get.side_effect = requests.ConnectionError
+        with self.assertRaises(requests.ConnectionError):
+            session.get("http://example.com")
+
+        self.assertEqual(session.metrics["requests"], 3)
+        self.assertEqual(session.metrics["errors"], 1)
+        self.assertEqual(session.metrics["bytes"], 10)
+        self.assertGreaterEqual(session.metrics["total_time"], 0)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the GitHub API: serves `resources` and answers
+    conditional requests with 304 when the validators still match.
+    """
+    resources: Dict[str, Dict] = {}
+    requests: list = []
+
+    def do_GET(self) -> None:
+        """Serve a resource, or 304 if the client's copy is current"""
+        resource = dict(self.resources[self.path])
+        self.requests.append((self.path, dict(self.headers)))
+        headers = {"Cache-Control": resource.get("cache", "max-age=0")}
+        if "echo" in resource:
+            # The body depends on a request header
+            name = resource["echo"]
+            resource["body"] = dict(resource["body"])
+            resource["body"][name] = self.headers.get(name)
+            if resource.get("Vary"):
+                headers["Vary"] = resource["Vary"]
+        for name in ("ETag", "Last-Modified"):
+            if name in resource:
+                headers[name] = resource[name]
+        not_modified = (
+            "ETag" in resource and
+            self.headers.get("If-None-Match") == resource["ETag"]
+        ) or (
+            "Last-Modified" in resource and
+            self.headers.get("If-Modified-Since") == resource["Last-Modified"]
+        )
+        body = b"" if not_modified else json.dumps(resource["body"]).encode()
+        self.send_response(304 if not_modified else 200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if not not_modified:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        """Keep test output quiet"""
+
+
+class TestHTTPCache(unittest.TestCase):
+    """
+    Test suite for the conditional-request `HTTPCache` under `get_json`,
+    run against a local stand-in HTTP server.
+    """
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Start the stand-in server on a free port"""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        cls.base_url = "http://127.0.0.1:{}".format(cls.server.server_port)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the stand-in server"""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        """A fresh cache file, installed on the shared session"""
+        _StandInHandler.resources = {
+            "/orgs/etag": {"body": {"login": "etag"}, "ETag": '"v1"'},
+            "/orgs/modified": {
+                "body": {"login": "modified"},
+                "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+            "/orgs/fresh": {"body": {"login": "fresh"}, "ETag": '"f"',
+                            "cache": "private, max-age=60"},
+            "/orgs/private": {"body": {"login": "private"}, "ETag": '"p"',
+                              "cache": "no-store"},
+            "/orgs/vary": {"body": {"login": "vary"}, "echo": "Accept",
+                           "Vary": "Accept", "cache": "max-age=60"},
+            "/orgs/token": {"body": {"login": "token"},
+                            "echo": "Authorization",
+                            "cache": "private, max-age=60"},
+        }
+        _StandInHandler.requests = []
+        self.tmp = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp, "http_cache.db")
+        self.cache = HTTPCache(self.cache_path)
+        configure_session(cache=self.cache, retries=0)
+
+    def tearDown(self) -> None:
+        """Restore the default session and remove the cache file"""
+        configure_session()
+        self.cache.close()
+        shutil.rmtree(self.tmp)
+
+    def url(self, path: str) -> str:
+        """Stand-in URL for `path`"""
+        return self.base_url + path
+
+    def test_etag_revalidation(self) -> None:
+        """
+        Tests that a stale entry is revalidated with If-None-Match and
+        the 304 is answered from the cache.
+        """
+        first = get_json(self.url("/orgs/etag"))
+        second = get_json(self.url("/orgs/etag"))
+
+        self.assertEqual(first, {"login": "etag"})
+        self.assertEqual(second, first)
+        self.assertEqual(len(_StandInHandler.requests), 2)
+        self.assertNotIn("If-None-Match", _StandInHandler.requests[0][1])
+        self.assertEqual(
+            _StandInHandler.requests[1][1]["If-None-Match"], '"v1"'
+        )
+        self.assertEqual(self.cache.metrics["revalidated"], 1)
+
+    def test_last_modified_revalidation(self) -> None:
+        """
+        Tests that Last-Modified is sent back as If-Modified-Since.
+        """
+        get_json(self.url("/orgs/modified"))
+        self.assertEqual(
+            get_json(self.url("/orgs/modified")), {"login": "modified"}
+        )
+        self.assertEqual(
+            _StandInHandler.requests[1][1]["If-Modified-Since"],
+            "Wed, 21 Oct 2015 07:28:00 GMT"
+        )
+        self.assertEqual(self.cache.metrics["revalidated"], 1)
+
+    def test_changed_resource(self) -> None:
+        """
+        Tests that a changed ETag replaces the cached body.
+        """
+        get_json(self.url("/orgs/etag"))
+        resource = _StandInHandler.resources["/orgs/etag"]
+        resource.update(body={"login": "etag", "v": 2}, ETag='"v2"')
+        self.assertEqual(
+            get_json(self.url("/orgs/etag")), {"login": "etag", "v": 2}
+        )
+        self.assertEqual(self.cache.metrics["misses"], 2)
+
+    def test_max_age_freshness(self) -> None:
+        """
+        Tests that a response within its max-age needs no request.
+        """
+        get_json(self.url("/orgs/fresh"))
+        self.assertEqual(get_json(self.url("/orgs/fresh")), {"login": "fresh"})
+        self.assertEqual(len(_StandInHandler.requests), 1)
+        self.assertEqual(self.cache.metrics["hits"], 1)
+
+    def test_no_store(self) -> None:
+        """
+        Tests that no-store responses are not kept.
+        """
+        get_json(self.url("/orgs/private"))
+        get_json(self.url("/orgs/private"))
+        self.assertNotIn("If-None-Match", _StandInHandler.requests[1][1])
+        self.assertEqual(self.cache.total_bytes(), 0)
+
+    def test_vary(self) -> None:
+        """
+        Tests that a response is only reused for requests with the same
+        values for the headers its Vary names.
+        """
+        url = self.url("/orgs/vary")
+        json_v3 = get_session().get(
+            url, headers={"Accept": "application/vnd.github.v3+json"}
+        ).json()
+        raw = get_session().get(
+            url, headers={"Accept": "application/json"}
+        ).json()
+        self.assertEqual(json_v3["Accept"], "application/vnd.github.v3+json")
+        self.assertEqual(raw["Accept"], "application/json")
+        self.assertEqual(len(_StandInHandler.requests), 2)
+
+        again = get_session().get(
+            url, headers={"Accept": "application/json"}
+        ).json()
+        self.assertEqual(again, raw)
+        self.assertEqual(len(_StandInHandler.requests), 2)
+
+    def test_authorization(self) -> None:
+        """
+        Tests that callers with different credentials never share an
+        entry, and that credentials are not used as cache keys.
+        """
+        url = self.url("/orgs/token")
+        session = get_session()
+        alice = session.get(url, headers={"Authorization": "token secret-a"})
+        bob = session.get(url, headers={"Authorization": "token secret-b"})
+        self.assertEqual(alice.json()["Authorization"], "token secret-a")
+        self.assertEqual(bob.json()["Authorization"], "token secret-b")
+
+        again = session.get(url, headers={"Authorization": "token secret-a"})
+        self.assertEqual(again.json()["Authorization"], "token secret-a")
+        self.assertEqual(len(_StandInHandler.requests), 2)
+        self.assertEqual(self.cache.metrics["hits"], 1)
+        keys = [row[0] for row in self.cache._conn.execute(
+            "SELECT url FROM responses"
+        )]
+        self.assertEqual(len(keys), 2)
+        self.assertFalse(any("secret-a" in key for key in keys))
+
+    def test_persists_across_restarts(self) -> None:
+        """
+        Tests that a new cache on the same file revalidates entries
+        stored by an earlier one.
+        """
+        get_json(self.url("/orgs/etag"))
+        reopened = HTTPCache(self.cache_path)
+        try:
+            configure_session(cache=reopened, retries=0)
+            self.assertEqual(get_json(self.url("/orgs/etag")),
+                             {"login": "etag"})
+            self.assertEqual(reopened.metrics["revalidated"], 1)
+        finally:
+            reopened.close()
+
+    def test_size_bound(self) -> None:
+        """
+        Tests that the least recently used entries are evicted once the
+        store exceeds max_bytes.
+        """
+        small = HTTPCache(os.path.join(self.tmp, "small.db"), max_bytes=40)
+        try:
+            configure_session(cache=small, retries=0)
+            for path in ("/orgs/etag", "/orgs/modified", "/orgs/fresh"):
+                get_json(self.url(path))
+            self.assertLessEqual(small.total_bytes(), 40)
+            self.assertGreaterEqual(small.metrics["evictions"], 1)
+            self.assertIsNone(small.lookup(self.url("/orgs/etag")))
+            self.assertIsNotNone(small.lookup(self.url("/orgs/fresh")))
+        finally:
+            small.close()
+
+
 class TestMemoize(unittest.TestCase):
     """
     Test suite for the `memoize` decorator.
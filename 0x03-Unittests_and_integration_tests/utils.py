@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 """Generic utilities for github org client.
 """
+import json
+import time
+import hashlib
+import sqlite3
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
 from functools import wraps
 from typing import (
     Mapping,
@@ -9,11 +17,18 @@ from typing import (
     Any,
     Dict,
     Callable,
+    Optional,
+    Tuple,
 )
 
 __all__ = [
     "access_nested_map",
+    "configure_session",
     "get_json",
+    "get_json_page",
+    "get_session",
+    "HTTPCache",
+    "HTTPSession",
     "memoize",
 ]
 
@@ -40,13 +55,376 @@ def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     return nested_map
 
 
+def _cache_control(headers: Mapping) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into {directive: value or None}"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class HTTPCache:
+    """Size-bounded on-disk store of responses for conditional requests.
+    Bodies are kept with their headers, so `ETag` and `Last-Modified` can be
+    sent back as `If-None-Match`/`If-Modified-Since` and a 304 answered from
+    disk. Entries are fresh for the response's Cache-Control max-age.
+    Entries are keyed by URL plus a hash of the request's Authorization,
+    and only match requests with the same values for the headers the
+    response's Vary names.
+    Parameters
+    ----------
+    path: str
+        SQLite file holding the entries; survives restarts
+    max_bytes: int
+        Most body bytes kept; least recently used entries go first
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            headers TEXT NOT NULL,
+            body BLOB NOT NULL,
+            expires REAL NOT NULL,
+            accessed REAL NOT NULL,
+            vary TEXT NOT NULL DEFAULT '{}'
+        )
+    """
+
+    def __init__(
+        self,
+        path: str = "http_cache.db",
+        max_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        """Init method of HTTPCache"""
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(self.SCHEMA)
+        columns = [row[1] for row in
+                   self._conn.execute("PRAGMA table_info(responses)")]
+        if "vary" not in columns:
+            # Files written before Vary was recorded
+            self._conn.execute(
+                "ALTER TABLE responses ADD COLUMN vary TEXT NOT NULL "
+                "DEFAULT '{}'"
+            )
+        self.metrics: Dict[str, int] = {
+            "hits": 0,          # fresh, served without a request
+            "revalidated": 0,   # served from disk after a 304
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    def lookup(
+        self,
+        key: str,
+    ) -> Optional[Tuple[Dict[str, str], bytes, float, Dict[str, str]]]:
+        """Return (headers, body, expires, vary) stored under `key`, or
+        None; `vary` maps each Vary header to the request value it was
+        stored for"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT headers, body, expires, vary FROM responses "
+                "WHERE url = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE url = ?",
+                (time.time(), key)
+            )
+        return json.loads(row[0]), row[1], row[2], json.loads(row[3])
+
+    def store(
+        self,
+        key: str,
+        headers: Mapping,
+        body: bytes,
+        expires: float,
+        vary: Optional[Mapping] = None,
+    ) -> None:
+        """Save a response, then evict down to `max_bytes`"""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, headers, body, expires, accessed, vary) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(dict(headers)), body, expires, time.time(),
+                 json.dumps(dict(vary or {})))
+            )
+            self._evict()
+
+    def refresh(self, key: str, headers: Mapping, expires: float) -> None:
+        """Update an entry after a 304 confirmed it is still current"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, expires = ?, accessed = ? "
+                "WHERE url = ?",
+                (json.dumps(dict(headers)), expires, time.time(), key)
+            )
+
+    def count(self, metric: str) -> None:
+        """Increment one of the cache metrics"""
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def total_bytes(self) -> int:
+        """Body bytes currently stored"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(length(body)), 0) FROM responses"
+            ).fetchone()[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under `max_bytes`"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(length(body)), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT url, length(body) FROM responses ORDER BY accessed"
+        ).fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.metrics["evictions"] += 1
+            total -= size
+
+    def close(self) -> None:
+        """Close the store"""
+        with self._lock:
+            self._conn.close()
+
+
+class HTTPSession:
+    """Shared requests session with pooled keep-alive connections.
+    Parameters
+    ----------
+    pool_size: int
+        Connections kept open per host; also the most concurrent requests
+        to one host before callers wait for a free connection
+    connect_timeout: float
+        Seconds to establish a connection
+    read_timeout: float
+        Seconds to wait between bytes of the response
+    retries: int
+        Retries of connection errors and 429/5xx responses
+    backoff: float
+        Backoff factor between retries: backoff * 2 ** (retry - 1) seconds,
+        or the server's Retry-After when it sends one
+    cache: HTTPCache
+        Optional conditional-request cache for every GET; the caller owns
+        and closes it
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        cache: Optional[HTTPCache] = None,
+    ) -> None:
+        """Init method of HTTPSession"""
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=retry,
+        )
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, float] = {
+            "requests": 0,
+            "errors": 0,
+            "total_time": 0.0,
+            "max_time": 0.0,
+            "bytes": 0,
+        }
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """GET `url` on a pooled connection, recording latency and size.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.cache is not None:
+            return self._cached_get(url, **kwargs)
+        return self._fetch(url, **kwargs)
+
+    def _fetch(self, url: str, **kwargs: Any) -> requests.Response:
+        """One request over the network, with metrics"""
+        started = time.perf_counter()
+        try:
+            response = self._session.get(url, **kwargs)
+        except requests.RequestException:
+            self._record(time.perf_counter() - started, 0, error=True)
+            raise
+        self._record(time.perf_counter() - started, len(response.content))
+        return response
+
+    def _cached_get(self, url: str, **kwargs: Any) -> requests.Response:
+        """GET through the cache: fresh entries skip the network, stale
+        ones are revalidated with the stored validators."""
+        cache = self.cache
+        headers = dict(kwargs.pop("headers", None) or {})
+        sent = CaseInsensitiveDict(self._session.headers)
+        sent.update(headers)
+        key = self._cache_key(url, sent)
+        entry = cache.lookup(key)
+        if entry is not None and any(
+            sent.get(name) != value for name, value in entry[3].items()
+        ):
+            # Stored for a different variant of this request
+            entry = None
+        if entry is not None and entry[2] > time.time():
+            cache.count("hits")
+            return self._cached_response(url, entry[0], entry[1])
+
+        if entry is not None:
+            stored = CaseInsensitiveDict(entry[0])
+            if "ETag" in stored:
+                headers["If-None-Match"] = stored["ETag"]
+            if "Last-Modified" in stored:
+                headers["If-Modified-Since"] = stored["Last-Modified"]
+        response = self._fetch(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            cache.count("revalidated")
+            merged = CaseInsensitiveDict(entry[0])
+            merged.update(response.headers)
+            cache.refresh(key, merged, self._expires(merged))
+            return self._cached_response(url, merged, entry[1])
+
+        cache.count("misses")
+        directives = _cache_control(response.headers)
+        validated = ("ETag" in response.headers or
+                     "Last-Modified" in response.headers)
+        expires = self._expires(response.headers)
+        vary = [name.strip() for name in
+                response.headers.get("Vary", "").split(",") if name.strip()]
+        if (response.status_code == 200 and "no-store" not in directives
+                and "*" not in vary
+                and (validated or expires > time.time())):
+            cache.store(key, response.headers,
+                        response.content, expires,
+                        {name: sent.get(name) for name in vary})
+        return response
+
+    @staticmethod
+    def _cache_key(url: str, sent: Mapping) -> str:
+        """Cache key for a request: one entry per URL and credential"""
+        authorization = sent.get("Authorization")
+        if authorization is None:
+            return url
+        # The credential itself is never written to disk
+        digest = hashlib.sha256(authorization.encode()).hexdigest()
+        return "{} auth={}".format(url, digest)
+
+    @staticmethod
+    def _expires(headers: Mapping) -> float:
+        """When a response stops being fresh, from its max-age"""
+        directives = _cache_control(headers)
+        if "no-cache" in directives:
+            return 0.0
+        try:
+            max_age = int(directives.get("max-age") or 0)
+        except ValueError:
+            max_age = 0
+        return time.time() + max_age
+
+    @staticmethod
+    def _cached_response(
+        url: str,
+        headers: Mapping,
+        body: bytes,
+    ) -> requests.Response:
+        """A 200 Response rebuilt from a cache entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        return response
+
+    def _record(self, elapsed: float, size: int, error: bool = False) -> None:
+        """Add one request to the metrics"""
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["errors"] += error
+            self.metrics["total_time"] += elapsed
+            self.metrics["max_time"] = max(self.metrics["max_time"], elapsed)
+            self.metrics["bytes"] += size
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        self._session.close()
+
+
+_session: Optional[HTTPSession] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> HTTPSession:
+    """Return the process-wide HTTPSession, creating it on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = HTTPSession()
+        return _session
+
+
+def configure_session(**options: Any) -> HTTPSession:
+    """Replace the process-wide HTTPSession with one built from `options`
+    (see HTTPSession) and close the old one.
+    """
+    global _session
+    with _session_lock:
+        old, _session = _session, HTTPSession(**options)
+    if old is not None:
+        old.close()
+    return _session
+
+
 def get_json(url: str) -> Dict:
-    """Get JSON from remote URL.
+    """Get JSON from remote URL over the shared session, through its
+    HTTPCache when one is configured, e.g.
+    configure_session(cache=HTTPCache("http_cache.db")).
     """
-    response = requests.get(url)
+    response = get_session().get(url)
     return response.json()
 
 
+def get_json_page(url: str) -> Tuple[Any, Dict[str, Dict[str, str]]]:
+    """Get JSON from remote URL together with its parsed `Link` header,
+    e.g. {"next": {"url": ..., "rel": "next"}, "last": {...}}.
+    """
+    response = get_session().get(url)
+    return response.json(), response.links
+
+
 def memoize(fn: Callable) -> Callable:
     """Decorator to memoize a method.
     Example
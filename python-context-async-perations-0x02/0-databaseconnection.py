@@ -1,4 +1,6 @@
+import time
 import sqlite3
+import threading
 
 class DatabaseConnection:
     def __init__(self, db_path):
@@ -22,6 +24,136 @@ class DatabaseConnection:
             self.cursor.close()
             self.conn.close()
 
+class ConnectionPool:
+    def __init__(self, db_path, size=5, timeout=None):
+        """
+        Thread-safe pool of sqlite3 connections to one database.
+        Args:
+            db_path (str): Path to the SQLite database.
+            size (int): Most connections open at once.
+            timeout (float): Seconds to wait for a free connection before
+                raising TimeoutError; None waits forever.
+        """
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.metrics = {
+            "checkouts": 0,
+            "waits": 0,        # checkouts that found the pool exhausted
+            "wait_time": 0.0,  # seconds spent waiting, summed
+            "max_wait": 0.0,
+            "timeouts": 0,
+            "peak_in_use": 0,
+        }
+
+    def acquire(self):
+        create = False
+        with self._cond:
+            self.metrics["checkouts"] += 1
+            if not self._idle and self._created >= self.size:
+                self.metrics["waits"] += 1
+                started = time.perf_counter()
+                available = self._cond.wait_for(
+                    lambda: self._idle or self._created < self.size,
+                    self.timeout)
+                waited = time.perf_counter() - started
+                self.metrics["wait_time"] += waited
+                self.metrics["max_wait"] = max(self.metrics["max_wait"], waited)
+                if not available:
+                    self.metrics["timeouts"] += 1
+                    raise TimeoutError(
+                        f"no connection to {self.db_path} free after {self.timeout}s")
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                self._created += 1
+                create = True
+            self._in_use += 1
+            self.metrics["peak_in_use"] = max(self.metrics["peak_in_use"], self._in_use)
+        if create:
+            try:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            except BaseException:
+                self._discard()
+                raise
+        return conn
+
+    def release(self, conn):
+        try:
+            # Never hand the next caller someone else's open transaction
+            conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            self._discard()
+            return
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def _discard(self):
+        with self._cond:
+            self._created -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+class PooledDatabaseConnection:
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, db_path, pool=None, pool_size=None, timeout=None):
+        """
+        Same `with` interface as DatabaseConnection, but the connection is
+        checked out of a pool shared by every PooledDatabaseConnection for
+        `db_path` (unless `pool` is given) and handed back afterwards.
+        `pool_size` (default 5) and `timeout` configure the shared pool
+        when it is created; passing values that differ from the existing
+        pool's raises ValueError.
+        """
+        self.db_path = db_path
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(db_path)
+                if pool is None:
+                    pool = self._pools[db_path] = ConnectionPool(
+                        db_path, pool_size or 5, timeout)
+                elif ((pool_size is not None and pool_size != pool.size) or
+                      (timeout is not None and timeout != pool.timeout)):
+                    raise ValueError(
+                        f"the shared pool for {db_path} already exists with "
+                        f"size={pool.size}, timeout={pool.timeout}")
+        self.pool = pool
+        self.conn = None
+        self.cursor = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        self.cursor = self.conn.cursor()
+        return self.cursor
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.conn:
+            try:
+                if exc_type is None:
+                    self.conn.commit()
+                else:
+                    self.conn.rollback()
+                self.cursor.close()
+            finally:
+                self.pool.release(self.conn)
+                self.conn = self.cursor = None
+
 if __name__ == "__main__":
     db_file = "users.db"
 
@@ -31,3 +163,14 @@ if __name__ == "__main__":
 
         for row in rows:
             print(row)
+
+    #### short with-blocks: new connection each time vs pooled
+    for label, cm in (("DatabaseConnection", DatabaseConnection),
+                      ("PooledDatabaseConnection", PooledDatabaseConnection)):
+        started = time.perf_counter()
+        for user_id in range(1, 1001):
+            with cm(db_file) as cursor:
+                cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+                cursor.fetchone()
+        print(f"{label}: {(time.perf_counter() - started) * 1e3:.1f} us/block")
+    print(PooledDatabaseConnection._pools[db_file].metrics)
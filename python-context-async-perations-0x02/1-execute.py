@@ -1,30 +1,159 @@
+import sys
+import time
 import sqlite3
+import itertools
+import threading
+
+class QueryTimeout(TimeoutError):
+    """The statement was aborted because its deadline passed."""
+
+class QueryCancelled(Exception):
+    """The statement was aborted by ExecuteQuery.cancel()."""
+
+class BulkExecuteError(sqlite3.Error):
+    def __init__(self, chunk_index, rowcounts, error):
+        """
+        Raised by ExecuteQuery(many=True) when a chunk fails.
+        Args:
+            chunk_index (int): Zero-based index of the chunk that failed.
+            rowcounts (list): Rowcounts of the chunks before it, which are
+                committed unless the run was atomic.
+            error (Exception): The underlying sqlite3 error, or whatever
+                the parameter iterable raised while building the chunk.
+        """
+        super().__init__(f"chunk {chunk_index} failed: {error}")
+        self.chunk_index = chunk_index
+        self.rowcounts = rowcounts
+        self.error = error
 
 class ExecuteQuery:
-    def __init__(self, db_path, query, params=None):
+    def __init__(self, db_path, query, params=None, stream=False,
+                 arraysize=1000, row_factory=None, many=False,
+                 chunk_size=500, atomic=False, timeout=None):
         """
         Custom context manager for executing a SQL query safely.
         Args:
             db_path (str): Path to the SQLite database.
             query (str): SQL query string.
             params (tuple/list): Parameters for parameterized query.
+            stream (bool): Return a lazy iterator over the rows instead of a
+                list. Rows are fetched `arraysize` at a time while the block
+                runs, so the iterator is only valid inside the with block.
+            arraysize (int): Rows per fetchmany() call when streaming.
+            row_factory (callable): Optional sqlite3 row factory, e.g.
+                sqlite3.Row.
+            many (bool): Bulk mode; `params` is an iterable (possibly a
+                generator) of parameter tuples run with executemany in
+                chunks of `chunk_size`. The block receives the per-chunk
+                rowcounts.
+            atomic (bool): In bulk mode, run every chunk in one transaction
+                instead of committing chunk by chunk.
+            timeout (float): Seconds from __enter__ after which the running
+                statement is aborted through a progress handler and
+                QueryTimeout is raised, including while streaming.
         """
         self.db_path = db_path
         self.query = query
         self.params = params or ()
+        self.stream = stream
+        self.arraysize = arraysize
+        self.row_factory = row_factory
+        self.many = many
+        self.chunk_size = chunk_size
+        self.atomic = atomic
+        self.timeout = timeout
+        self._deadline = None
+        self._cancelled = False
         self.conn = None
         self.cursor = None
         self.result = None
 
     def __enter__(self):
         self.conn = sqlite3.connect(self.db_path)
+        if self.row_factory is not None:
+            self.conn.row_factory = self.row_factory
         self.cursor = self.conn.cursor()
+        self.cursor.arraysize = self.arraysize
+        if self.timeout is not None:
+            self._deadline = time.monotonic() + self.timeout
+            # Called every 1000 VM instructions; non-zero aborts the statement
+            self.conn.set_progress_handler(
+                lambda: time.monotonic() > self._deadline, 1000)
+
+        if self.many:
+            try:
+                self.result = self._execute_many()
+            except BaseException:
+                # Roll back whatever the failed run left uncommitted
+                self.__exit__(*sys.exc_info())
+                raise
+            return self.result
 
         # Execute the query
-        self.cursor.execute(self.query, self.params)
-        self.result = self.cursor.fetchall()  # Get all rows
+        try:
+            self.cursor.execute(self.query, self.params)
+            if self.stream:
+                self.result = self._iter_rows()
+            else:
+                self.result = self.cursor.fetchall()  # Get all rows
+        except BaseException as e:
+            # __exit__ never runs when __enter__ raises; close up here
+            self.__exit__(*sys.exc_info())
+            if isinstance(e, sqlite3.OperationalError):
+                raise self._translate(e) from e
+            raise
         return self.result
 
+    def cancel(self):
+        """Abort the running statement from another thread."""
+        self._cancelled = True
+        if self.conn:
+            self.conn.interrupt()
+
+    def _translate(self, error):
+        # "interrupted" is all SQLite reports; work out which abort it was
+        if self._cancelled:
+            _count_abort("cancelled")
+            return QueryCancelled(f"query cancelled: {self.query}")
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            _count_abort("timeouts")
+            return QueryTimeout(
+                f"query exceeded {self.timeout}s deadline: {self.query}")
+        return error
+
+    def _execute_many(self):
+        rowcounts = []
+        params = iter(self.params)
+        while True:
+            try:
+                chunk = list(itertools.islice(params, self.chunk_size))
+            except Exception as e:
+                # The parameter iterable itself failed mid-run
+                raise BulkExecuteError(len(rowcounts), rowcounts, e) from e
+            if not chunk:
+                break
+            try:
+                self.cursor.executemany(self.query, chunk)
+                if not self.atomic:
+                    self.conn.commit()
+            except sqlite3.Error as e:
+                # Only this chunk (or, if atomic, the whole run) is undone
+                self.conn.rollback()
+                error = self._translate(e)
+                raise BulkExecuteError(len(rowcounts), rowcounts, error) from e
+            rowcounts.append(self.cursor.rowcount)
+        return rowcounts
+
+    def _iter_rows(self):
+        while True:
+            try:
+                rows = self.cursor.fetchmany()
+            except sqlite3.OperationalError as e:
+                raise self._translate(e) from e
+            if not rows:
+                return
+            yield from rows
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         # Clean up
         if self.cursor:
@@ -36,11 +165,62 @@ class ExecuteQuery:
                 self.conn.rollback()
             self.conn.close()
 
+# Aborted statements across every ExecuteQuery, by cause
+aborted_queries = {"timeouts": 0, "cancelled": 0}
+_aborted_lock = threading.Lock()
+
+def _count_abort(cause):
+    with _aborted_lock:
+        aborted_queries[cause] += 1
+
+def _peak_memory(db_path, query, **options):
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        with ExecuteQuery(db_path, query, **options) as rows:
+            count = sum(1 for _ in rows)
+        return count, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
 if __name__ == "__main__":
-    db_file = "users.db"
-    query = "SELECT * FROM users WHERE age > ?"
-    param = (25,)
+    import os
+    import shutil
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        #### work on a copy so the bulk update leaves users.db untouched
+        db_file = os.path.join(tmp, "users.db")
+        shutil.copyfile("users.db", db_file)
+        query = "SELECT * FROM users WHERE age > ?"
+        param = (25,)
+
+        with ExecuteQuery(db_file, query, param) as results:
+            for row in results:
+                print(row)
+
+        #### bulk mode: one connection, chunked executemany, rowcounts back
+        with ExecuteQuery(db_file, "SELECT id, email FROM users") as users:
+            pass
+        with ExecuteQuery(db_file, "UPDATE users SET email = ? WHERE id = ?",
+                          ((email, user_id) for user_id, email in users),
+                          many=True, chunk_size=250) as rowcounts:
+            print(f"updated {sum(rowcounts)} rows in {len(rowcounts)} chunks")
 
-    with ExecuteQuery(db_file, query, param) as results:
-        for row in results:
-            print(row)
+        #### streaming keeps peak memory flat as the result set grows
+        big_db = os.path.join(tmp, "big.db")
+        conn = sqlite3.connect(big_db)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+        with ExecuteQuery(db_file, "SELECT name, email, age FROM users") as sample:
+            pass
+        for rows in (10_000, 100_000):
+            conn.execute("DELETE FROM users")
+            conn.executemany(
+                "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                (sample[i % len(sample)] for i in range(rows)))
+            conn.commit()
+            for stream in (False, True):
+                count, peak = _peak_memory(big_db, "SELECT * FROM users", stream=stream)
+                label = "stream" if stream else "fetchall"
+                print(f"{label:>8}: {count:>7} rows, peak {peak / 1024:>9.0f} KiB")
+        conn.close()
@@ -1,34 +1,42 @@
 import asyncio
-import aiosqlite
 
 DB_PATH = "users.db"
 
+# One shared pool instead of an aiosqlite connection (and thread) per query
+pool = __import__('4-async_pool').AsyncPool(DB_PATH, readers=4)
+
+# Rows arrive chunk by chunk; use contextlib.aclosing() to stop early
+def stream(query, params=(), chunk=500):
+    return pool.stream(query, params, chunk=chunk)
+
 # Fetch all users
 async def async_fetch_users():
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT * FROM users") as cursor:
-            users = await cursor.fetchall()
-            print("All Users:")
-            for user in users:
-                print(user)
-            return users
+    users = []
+    print("All Users:")
+    async for user in stream("SELECT * FROM users"):
+        print(user)
+        users.append(user)
+    return users
 
 # Fetch users older than 40
 async def async_fetch_older_users():
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT * FROM users WHERE age > ?", (40,)) as cursor:
-            users = await cursor.fetchall()
-            print("\nUsers older than 40:")
-            for user in users:
-                print(user)
-            return users
+    users = []
+    print("\nUsers older than 40:")
+    async for user in stream("SELECT * FROM users WHERE age > ?", (40,)):
+        print(user)
+        users.append(user)
+    return users
 
-# Run both queries concurrently
-async def fetch_concurrently():
-    await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
-    )
+# Run both queries concurrently; on timeout the running statements are
+# interrupted, not left holding their connections
+async def fetch_concurrently(timeout=None):
+    try:
+        await asyncio.wait_for(asyncio.gather(
+            async_fetch_users(),
+            async_fetch_older_users()
+        ), timeout)
+    finally:
+        await pool.close()
 
 # Entry point
 if __name__ == "__main__":
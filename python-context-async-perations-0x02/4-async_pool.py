@@ -0,0 +1,256 @@
+import time
+import sqlite3
+import asyncio
+import contextlib
+import aiosqlite
+
+QueryTimeout = __import__('1-execute').QueryTimeout
+
+
+class AsyncPool:
+    def __init__(self, db_path, readers=4, max_concurrency=None,
+                 timeout=None):
+        """
+        Shared aiosqlite pool: a fixed set of read-only connections plus one
+        writer connection that serializes every write. Each aiosqlite
+        connection owns a thread, so this bounds threads and file handles
+        no matter how many coroutines are gathered.
+        Args:
+            db_path (str): Path to the SQLite database.
+            readers (int): Reader connections.
+            max_concurrency (int): Operations admitted at once, readers and
+                writer together; defaults to readers + 1. Waiters are
+                admitted in arrival order.
+            timeout (float): Default per-query deadline in seconds. When a
+                deadline passes or the caller is cancelled, the running
+                statement is interrupted rather than left to finish on the
+                connection's thread.
+        """
+        self.db_path = db_path
+        self.readers = readers
+        self.max_concurrency = max_concurrency or readers + 1
+        self.timeout = timeout
+        self.metrics = {
+            "acquired": 0,
+            "saturated": 0,     # acquisitions that had to queue
+            "wait_time": 0.0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "waiting": 0,
+            "peak_waiting": 0,
+            "timeouts": 0,      # statements interrupted at their deadline
+            "cancelled": 0,     # statements interrupted by cancellation
+        }
+        self._reset()
+
+    def _reset(self):
+        self._admission = None
+        self._idle = None
+        self._write_lock = None
+        self._writer = None
+        self._connections = []
+        self._opening = None
+
+    async def open(self):
+        """Connect every reader and the writer; called on first use."""
+        if self._opening is None:
+            self._opening = asyncio.get_running_loop().create_task(self._open())
+        # Shielded: one cancelled caller must not abort a half-open pool
+        await asyncio.shield(self._opening)
+
+    async def _open(self):
+        self._admission = asyncio.Semaphore(self.max_concurrency)
+        self._idle = asyncio.Queue()
+        self._write_lock = asyncio.Lock()
+        try:
+            for _ in range(self.readers):
+                conn = await aiosqlite.connect(self.db_path)
+                self._connections.append(conn)
+                await conn.execute("PRAGMA query_only = ON")
+                self._idle.put_nowait(conn)
+            self._writer = await aiosqlite.connect(self.db_path)
+            self._connections.append(self._writer)
+        except BaseException:
+            await self._discard()
+            raise
+
+    async def close(self):
+        """Close every connection; the pool reopens on next use."""
+        opening = self._opening
+        if opening is not None and not opening.done():
+            await asyncio.wait({opening})
+        await self._discard()
+
+    async def _discard(self):
+        connections = self._connections
+        self._reset()
+        for conn in connections:
+            await conn.close()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @contextlib.asynccontextmanager
+    async def _admitted(self):
+        await self.open()
+        # Held locally so a late release after close() can't touch the
+        # primitives of a reopened pool
+        admission = self._admission
+        metrics = self.metrics
+        queued = admission.locked()
+        if queued:
+            metrics["saturated"] += 1
+        metrics["waiting"] += 1
+        metrics["peak_waiting"] = max(metrics["peak_waiting"], metrics["waiting"])
+        started = time.perf_counter()
+        try:
+            await admission.acquire()
+        finally:
+            metrics["waiting"] -= 1
+        metrics["wait_time"] += time.perf_counter() - started
+        metrics["acquired"] += 1
+        metrics["in_use"] += 1
+        metrics["peak_in_use"] = max(metrics["peak_in_use"], metrics["in_use"])
+        try:
+            yield
+        finally:
+            metrics["in_use"] -= 1
+            admission.release()
+
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        """Check out a read-only connection."""
+        async with self._admitted():
+            idle = self._idle
+            conn = await idle.get()
+            try:
+                yield conn
+            finally:
+                idle.put_nowait(conn)
+
+    @contextlib.asynccontextmanager
+    async def writer(self):
+        """Hold the single writer connection; commits on success."""
+        async with self._admitted():
+            async with self._write_lock:
+                try:
+                    yield self._writer
+                except BaseException:
+                    await self._writer.rollback()
+                    raise
+                else:
+                    await self._writer.commit()
+
+    def _deadline(self, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return None
+        return asyncio.get_running_loop().time() + timeout
+
+    async def _guarded(self, conn, operation, deadline, query):
+        """Await `operation` on `conn`, interrupting its statement if the
+        deadline passes or the caller is cancelled."""
+        task = asyncio.ensure_future(operation)
+        timeout = None
+        if deadline is not None:
+            timeout = max(0, deadline - asyncio.get_running_loop().time())
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.metrics["timeouts"] += 1
+            await self._interrupt(conn, task)
+            raise QueryTimeout(f"query exceeded its deadline: {query}") from None
+        except asyncio.CancelledError:
+            self.metrics["cancelled"] += 1
+            await self._interrupt(conn, task)
+            raise
+
+    @staticmethod
+    async def _interrupt(conn, task):
+        await conn.interrupt()
+        # Let the aborted statement unwind so the connection is idle again
+        # before it goes back to the pool
+        await asyncio.wait({task})
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, conn, query, params, method):
+        cursor = await conn.execute(query, params)
+        try:
+            return await getattr(cursor, method)()
+        finally:
+            await cursor.close()
+
+    async def fetchall(self, query, params=(), timeout=None):
+        deadline = self._deadline(timeout)
+        async with self.reader() as conn:
+            return await self._guarded(
+                conn, self._fetch(conn, query, params, "fetchall"), deadline, query)
+
+    async def fetchone(self, query, params=(), timeout=None):
+        deadline = self._deadline(timeout)
+        async with self.reader() as conn:
+            return await self._guarded(
+                conn, self._fetch(conn, query, params, "fetchone"), deadline, query)
+
+    async def stream(self, query, params=(), chunk=500, timeout=None):
+        """
+        Async generator over the rows of a read, fetched `chunk` rows at a
+        time so the consumer starts on the first chunk immediately. The
+        reader connection is held until the generator finishes, is closed
+        or is garbage collected; wrap it in contextlib.aclosing() to give
+        the connection back as soon as the consumer stops early. The
+        deadline covers the whole stream, not each chunk.
+        """
+        deadline = self._deadline(timeout)
+        async with self.reader() as conn:
+            cursor = await self._guarded(
+                conn, conn.execute(query, params), deadline, query)
+            try:
+                while True:
+                    rows = await self._guarded(
+                        conn, cursor.fetchmany(chunk), deadline, query)
+                    if not rows:
+                        return
+                    for row in rows:
+                        yield row
+            finally:
+                # May run from the garbage collector after close()
+                with contextlib.suppress(ValueError, sqlite3.Error):
+                    await cursor.close()
+
+    async def _write(self, conn, method, query, params):
+        cursor = await getattr(conn, method)(query, params)
+        try:
+            return cursor.rowcount
+        finally:
+            await cursor.close()
+
+    async def execute(self, query, params=(), timeout=None):
+        """Run a write on the writer connection and commit it."""
+        deadline = self._deadline(timeout)
+        async with self.writer() as conn:
+            return await self._guarded(
+                conn, self._write(conn, "execute", query, params), deadline, query)
+
+    async def executemany(self, query, params, timeout=None):
+        deadline = self._deadline(timeout)
+        async with self.writer() as conn:
+            return await self._guarded(
+                conn, self._write(conn, "executemany", query, params), deadline, query)
+
+
+if __name__ == "__main__":
+    async def main():
+        #### 200 concurrent queries share 4 reader connections
+        async with AsyncPool("users.db", readers=4) as pool:
+            results = await asyncio.gather(*(
+                pool.fetchone("SELECT * FROM users WHERE id = ?", (i,))
+                for i in range(1, 201)))
+            print(len(results), "rows;", pool.metrics)
+
+    asyncio.run(main())
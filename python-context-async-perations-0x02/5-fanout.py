@@ -0,0 +1,116 @@
+import asyncio
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+AsyncPool = __import__('4-async_pool').AsyncPool
+
+# process must be a picklable top-level function taking the fetched rows
+Job = collections.namedtuple("Job", "query params process")
+
+
+class FanOutRunner:
+    def __init__(self, pool, processes=None, task_timeout=None,
+                 mp_context=None):
+        """
+        Runs a batch of queries concurrently through an AsyncPool and hands
+        each result to a ProcessPoolExecutor for CPU-bound post-processing,
+        so the event loop thread only waits.
+        Args:
+            pool (AsyncPool): Where the queries run.
+            processes (int): Worker processes; defaults to the CPU count.
+            task_timeout (float): Deadline for one job, query plus
+                processing. A query past its deadline is interrupted; work
+                already running in a process finishes but its result is
+                dropped.
+            mp_context: multiprocessing context for the workers. Defaults
+                to forkserver (spawn where unavailable): the workers start
+                lazily, and forking while aiosqlite threads are running can
+                leave a child with locks held by threads it doesn't have.
+        """
+        self.pool = pool
+        self.task_timeout = task_timeout
+        if mp_context is None:
+            methods = multiprocessing.get_all_start_methods()
+            mp_context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn")
+        self.executor = ProcessPoolExecutor(max_workers=processes,
+                                            mp_context=mp_context)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # Don't block the event loop on workers still running; queued work
+        # is dropped and the processes exit once their current job ends
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _job(self, job):
+        rows = await self.pool.fetchall(job.query, job.params)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, job.process, rows)
+
+    def _start(self, jobs):
+        return [asyncio.ensure_future(
+                    asyncio.wait_for(self._job(job), self.task_timeout))
+                for job in jobs]
+
+    @staticmethod
+    async def _cancel(tasks):
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, jobs):
+        """Results in job order. If any job fails, or the caller is
+        cancelled, every other job is cancelled and the error re-raised."""
+        tasks = self._start(jobs)
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            await self._cancel(tasks)
+            raise
+
+    async def as_completed(self, jobs):
+        """
+        Async generator of (job index, result) in completion order. Leaving
+        the loop early, a failing job or cancellation cancels the rest.
+        """
+        tasks = self._start(jobs)
+        index = {task: i for i, task in enumerate(tasks)}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield index[task], task.result()
+        finally:
+            await self._cancel(list(pending))
+
+
+def age_histogram(rows):
+    """Example CPU-side step: users per decade of age."""
+    histogram = collections.Counter(row[3] // 10 * 10 for row in rows)
+    return dict(sorted(histogram.items()))
+
+
+async def main():
+    jobs = [Job("SELECT * FROM users WHERE age > ?", (age,), age_histogram)
+            for age in (20, 40, 60, 80)]
+    async with AsyncPool("users.db") as pool:
+        async with FanOutRunner(pool, task_timeout=10) as runner:
+            #### ordered results
+            for job, histogram in zip(jobs, await runner.run(jobs)):
+                print(job.params, histogram)
+
+            #### as each job finishes
+            async for i, histogram in runner.as_completed(jobs):
+                print("done:", jobs[i].params, sum(histogram.values()), "users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,330 @@
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import aiosqlite
+
+dbconn = __import__('0-databaseconnection')
+AsyncPool = __import__('4-async_pool').AsyncPool
+
+LEVELS = (1, 4, 16, 64, 256)
+# Every worker runs at least this many operations, so all of them are
+# still busy together and a level really runs at its concurrency
+MIN_OPS_PER_WORKER = 50
+# Share of each operation in the standard mix
+MIX = (("point", 0.7), ("range", 0.2), ("write", 0.1))
+
+
+def generate_db(path, rows=10_000, seed=0):
+    """Create a users.db-shaped database of `rows` synthetic users in WAL
+    mode, with an age index for the range scans."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute('''
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                age INTEGER NOT NULL
+            )
+        ''')
+        conn.executemany(
+            "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+            ((f"user{i}", f"user{i}@example.com", rng.randint(18, 120))
+             for i in range(rows)))
+        conn.execute("CREATE INDEX idx_users_age ON users(age)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def workload(ops, rows, seed=0):
+    """The standard mix as (kind, query, params) tuples, same for every run."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*MIX)
+    work = []
+    for i, kind in enumerate(rng.choices(kinds, weights, k=ops)):
+        if kind == "point":
+            work.append((kind, "SELECT * FROM users WHERE id = ?",
+                         (rng.randint(1, rows),)))
+        elif kind == "range":
+            age = rng.randint(18, 115)
+            work.append((kind, "SELECT * FROM users WHERE age BETWEEN ? AND ? "
+                               "LIMIT 100", (age, age + 5)))
+        else:
+            work.append((kind, "UPDATE users SET email = ? WHERE id = ?",
+                         (f"bench{i}@example.com", rng.randint(1, rows))))
+    return work
+
+
+def _open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None  # not Linux
+
+
+class _Sampler:
+    """Tracks peak thread and file descriptor counts while a run is going."""
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_fds = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        self.peak_threads = max(self.peak_threads, threading.active_count())
+        fds = _open_fds()
+        if fds is not None:
+            self.peak_fds = max(self.peak_fds or 0, fds)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+
+
+# --- sync styles: `concurrency` threads, each taking every Nth operation
+
+def _run_threads(work, concurrency, run_op):
+    """Returns (latencies, errors, elapsed); the clock starts once every
+    thread is up and waiting at the start barrier."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    started = []
+    barrier = threading.Barrier(
+        concurrency, action=lambda: started.append(time.perf_counter()))
+
+    def worker(ops):
+        barrier.wait()
+        mine = []
+        failed = 0
+        for op in ops:
+            started = time.perf_counter()
+            try:
+                run_op(op)
+            except sqlite3.Error:
+                failed += 1
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(work[i::concurrency],))
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started[0]
+
+
+def sync_per_call(db_path, work, concurrency, pool_size):
+    """A new DatabaseConnection for every operation."""
+    def run_op(op):
+        with dbconn.DatabaseConnection(db_path) as cursor:
+            cursor.execute(op[1], op[2])
+            cursor.fetchall()
+    return _run_threads(work, concurrency, run_op)
+
+
+def sync_pooled(db_path, work, concurrency, pool_size):
+    """PooledDatabaseConnection over a ConnectionPool of `pool_size`."""
+    pool = dbconn.ConnectionPool(db_path, size=pool_size)
+
+    def run_op(op):
+        with dbconn.PooledDatabaseConnection(db_path, pool=pool) as cursor:
+            cursor.execute(op[1], op[2])
+            cursor.fetchall()
+    try:
+        return _run_threads(work, concurrency, run_op)
+    finally:
+        pool.close()
+
+
+# --- async styles: `concurrency` coroutines on one event loop
+
+async def _run_tasks(work, concurrency, run_op):
+    """Returns (latencies, errors, elapsed), like _run_threads."""
+    latencies = []
+    errors = 0
+
+    async def worker(ops):
+        nonlocal errors
+        for op in ops:
+            started = time.perf_counter()
+            try:
+                await run_op(op)
+            except sqlite3.Error:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(work[i::concurrency])
+                           for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def thread_pool(db_path, work, concurrency, pool_size):
+    """Coroutines handing blocking sqlite3 calls to a ThreadPoolExecutor
+    of `pool_size` threads, each with its own connection."""
+    local = threading.local()
+    connections = []
+
+    def blocking(op):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = sqlite3.connect(
+                db_path, check_same_thread=False)
+            connections.append(conn)
+        with conn:
+            conn.execute(op[1], op[2]).fetchall()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            return await _run_tasks(
+                work, concurrency,
+                lambda op: loop.run_in_executor(executor, blocking, op))
+    try:
+        return asyncio.run(main())
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def aiosqlite_per_call(db_path, work, concurrency, pool_size):
+    """An aiosqlite connection (and thread) per operation, as the original
+    3-concurrent.py did."""
+    async def run_op(op):
+        async with aiosqlite.connect(db_path) as conn:
+            cursor = await conn.execute(op[1], op[2])
+            await cursor.fetchall()
+            await conn.commit()
+    return asyncio.run(_run_tasks(work, concurrency, run_op))
+
+
+def aiosqlite_pooled(db_path, work, concurrency, pool_size):
+    """The shared AsyncPool: `pool_size` readers plus one writer."""
+    async def main():
+        async with AsyncPool(db_path, readers=pool_size) as pool:
+            async def run_op(op):
+                if op[0] == "write":
+                    await pool.execute(op[1], op[2])
+                else:
+                    await pool.fetchall(op[1], op[2])
+            return await _run_tasks(work, concurrency, run_op)
+    return asyncio.run(main())
+
+
+STYLES = {
+    "sync-per-call": sync_per_call,
+    "sync-pooled": sync_pooled,
+    "thread-pool": thread_pool,
+    "aiosqlite": aiosqlite_per_call,
+    "aiosqlite-pooled": aiosqlite_pooled,
+}
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_benchmark(db_path, styles=tuple(STYLES), levels=LEVELS, ops=2000,
+                  pool_size=8, rows=10_000, seed=0):
+    """
+    Run the standard mix once per style and concurrency level against
+    `db_path` (see generate_db) and return one result dict per run. Each
+    run does at least `ops` operations, and at least MIN_OPS_PER_WORKER
+    per worker at high concurrency. Setup (threads, pools) is not timed.
+    """
+    results = []
+    for style in styles:
+        for concurrency in levels:
+            per_worker = max(-(-ops // concurrency), MIN_OPS_PER_WORKER)
+            work = workload(per_worker * concurrency, rows, seed)
+            with _Sampler() as sampler:
+                latencies, errors, elapsed = STYLES[style](
+                    db_path, work, concurrency, pool_size)
+            latencies.sort()
+            results.append({
+                "style": style,
+                "concurrency": concurrency,
+                "ops": len(latencies),
+                "errors": errors,
+                "seconds": round(elapsed, 4),
+                "throughput": round(len(latencies) / elapsed, 1),
+                "p50_ms": round(_percentile(latencies, 0.50) * 1e3, 3),
+                "p99_ms": round(_percentile(latencies, 0.99) * 1e3, 3),
+                "peak_threads": sampler.peak_threads,
+                "peak_fds": sampler.peak_fds,
+            })
+    return results
+
+
+def format_table(results):
+    lines = [f"{'style':<17} {'conc':>5} {'ops/s':>10} {'p50 ms':>9} "
+             f"{'p99 ms':>9} {'errors':>6} {'threads':>7} {'fds':>5}"]
+    for r in results:
+        lines.append(
+            f"{r['style']:<17} {r['concurrency']:>5} {r['throughput']:>10,.0f} "
+            f"{r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['errors']:>6} "
+            f"{r['peak_threads']:>7} {r['peak_fds'] if r['peak_fds'] is not None else '-':>5}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare sync, threaded and aiosqlite access styles.")
+    parser.add_argument("--styles", nargs="+", choices=STYLES,
+                        default=list(STYLES))
+    parser.add_argument("--levels", nargs="+", type=int, default=list(LEVELS),
+                        help="concurrency levels")
+    parser.add_argument("--ops", type=int, default=2000,
+                        help="operations per run, at least "
+                             f"{MIN_OPS_PER_WORKER} per worker")
+    parser.add_argument("--rows", type=int, default=10_000,
+                        help="users in the generated database")
+    parser.add_argument("--pool-size", type=int, default=8,
+                        help="connections or threads for the pooled styles")
+    parser.add_argument("--json", metavar="PATH",
+                        help="also write the results as JSON ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        #### generated database, so the tracked users.db is never written
+        db_path = os.path.join(tmp, "users.db")
+        generate_db(db_path, args.rows)
+        results = run_benchmark(db_path, args.styles, args.levels, args.ops,
+                                args.pool_size, args.rows)
+    print(format_table(results))
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
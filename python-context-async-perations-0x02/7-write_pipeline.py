@@ -0,0 +1,257 @@
+import time
+import sqlite3
+import asyncio
+import aiosqlite
+
+_STOP = object()
+
+
+class AsyncWritePipeline:
+    def __init__(self, db_path, query, max_batch=500, max_delay=0.01,
+                 max_queue=10_000):
+        """
+        Ingests rows from many coroutines through one aiosqlite connection:
+        producers queue parameter rows for `query` and a single writer task
+        commits them in batches.
+        Args:
+            db_path (str): Path to the SQLite database.
+            query (str): Write statement every row is bound to, e.g.
+                "INSERT INTO users (name, email, age) VALUES (?, ?, ?)".
+            max_batch (int): Most rows committed per transaction.
+            max_delay (float): Seconds to keep collecting a batch after its
+                first row arrives.
+            max_queue (int): Rows buffered before put() starts waiting, so a
+                burst slows producers down instead of growing memory.
+        """
+        self.db_path = db_path
+        self.query = query
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.metrics = {
+            "rows": 0,          # rows committed
+            "failed": 0,        # rows rejected by SQLite
+            "batches": 0,       # transactions committed
+            "backpressure": 0,  # puts that found the queue full
+            "peak_depth": 0,
+        }
+        self._queue = None
+        self._arrived = None
+        self._writer = None
+        self._starting = asyncio.Lock()
+        self._conn = None
+        self._closed = False
+        self._error = None
+
+    async def start(self):
+        # Concurrent first puts must not each start a writer
+        async with self._starting:
+            if self._writer is None:
+                self._queue = asyncio.Queue(self.max_queue)
+                self._arrived = asyncio.Event()
+                self._conn = await aiosqlite.connect(self.db_path)
+                self._writer = asyncio.create_task(self._run())
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def put(self, row):
+        """
+        Queue one parameter row, waiting while the queue is full. Returns
+        the durability acknowledgement: a future that resolves to the
+        number of the batch that committed the row, or raises the SQLite
+        error that rejected it. Raises RuntimeError once the pipeline is
+        closed or its writer has died.
+        """
+        self._check()
+        await self.start()
+        if self._queue.full():
+            self.metrics["backpressure"] += 1
+        ack = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, ack))
+        if self._error is not None:
+            # The writer died while this put waited for room; nobody will
+            # see this row's ack, so it is cancelled rather than failed
+            ack.cancel()
+            self._drain(self._error)
+            self._check()
+        self.metrics["peak_depth"] = max(self.metrics["peak_depth"],
+                                         self._queue.qsize())
+        self._arrived.set()
+        return ack
+
+    async def flush(self):
+        """Wait until every row queued so far is committed or rejected."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Stop accepting rows, commit everything queued and disconnect."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is None:
+            return
+        if self._error is None:
+            await self._queue.put((_STOP, None))
+            self._arrived.set()
+        try:
+            await self._writer
+        finally:
+            await self._conn.close()
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError("AsyncWritePipeline stopped") from self._error
+        if self._closed:
+            raise RuntimeError("AsyncWritePipeline is closed")
+
+    async def _run(self):
+        try:
+            await self._serve()
+        except BaseException as e:
+            self._fail(e)
+            if not isinstance(e, Exception):
+                raise
+
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        stop = False
+        while not stop:
+            item = await self._queue.get()
+            batch = []
+            deadline = loop.time() + self.max_delay
+            while item is not None:
+                if item[0] is _STOP:
+                    stop = True
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                item = await self._next(deadline)
+            if batch:
+                try:
+                    await self._commit(batch)
+                except BaseException as e:
+                    for _, ack in batch:
+                        if not ack.done():
+                            ack.set_exception(e)
+                    raise
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+    def _fail(self, error):
+        # The writer task is gone: refuse new rows and fail what is queued
+        self._error = error
+        self._drain(error)
+
+    def _drain(self, error):
+        while not self._queue.empty():
+            row, ack = self._queue.get_nowait()
+            self._queue.task_done()
+            if row is not _STOP and not ack.done():
+                ack.set_exception(error)
+
+    async def _next(self, deadline):
+        """The next queued item, waiting until `deadline`; None if none
+        arrives in time."""
+        loop = asyncio.get_running_loop()
+        while self._queue.empty():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            # Waiting on an event, not queue.get(), so a timeout can never
+            # drop a row
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return self._queue.get_nowait()
+
+    async def _commit(self, batch):
+        rows = [row for row, _ in batch]
+        conn = self._conn
+        try:
+            await conn.executemany(self.query, rows)
+            await conn.commit()
+            outcomes = [None] * len(batch)
+        except sqlite3.Error:
+            await conn.rollback()
+            outcomes = await self._commit_each(rows)
+        self.metrics["batches"] += 1
+        for (_, ack), error in zip(batch, outcomes):
+            if error is None:
+                self.metrics["rows"] += 1
+                if not ack.done():
+                    ack.set_result(self.metrics["batches"])
+            else:
+                self.metrics["failed"] += 1
+                if not ack.done():
+                    ack.set_exception(error)
+
+    async def _commit_each(self, rows):
+        # Slow path after a batch failed: each row under its own savepoint,
+        # so a bad row only fails its own acknowledgement; all of them in one
+        # transaction, so nothing is durable before the COMMIT
+        outcomes = []
+        conn = self._conn
+        try:
+            await conn.execute("BEGIN")
+            for row in rows:
+                await conn.execute("SAVEPOINT row")
+                try:
+                    await conn.execute(self.query, row)
+                except sqlite3.Error as e:
+                    await conn.execute("ROLLBACK TO row")
+                    outcomes.append(e)
+                else:
+                    outcomes.append(None)
+                await conn.execute("RELEASE row")
+            await conn.commit()
+        except sqlite3.Error as e:
+            await conn.rollback()
+            return [e] * len(rows)
+        return outcomes
+
+
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+
+    async def main(db_path):
+        query = "INSERT INTO users (name, email, age) VALUES (?, ?, ?)"
+
+        #### 50 handlers each ingest a burst of 200 rows
+        async with AsyncWritePipeline(db_path, query, max_queue=1000) as pipeline:
+            async def handler(n):
+                acks = [await pipeline.put((f"user{n}-{i}", f"u{n}-{i}@example.com", 30))
+                        for i in range(200)]
+                return await asyncio.gather(*acks)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(handler(n) for n in range(50)))
+            elapsed = time.perf_counter() - started
+            print(f"{pipeline.metrics['rows']} rows in {elapsed:.2f}s "
+                  f"({pipeline.metrics['rows'] / elapsed:,.0f} rows/sec)")
+
+            #### a NULL name breaks NOT NULL; only its own ack fails
+            bad = await pipeline.put((None, "bad@example.com", 30))
+            good = await pipeline.put(("ok", "ok@example.com", 30))
+            await pipeline.flush()
+            print("good row committed in batch", good.result(),
+                  "| bad row:", bad.exception())
+        print(pipeline.metrics)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        #### work on a copy so the demo rows stay out of users.db
+        db_path = os.path.join(tmp, "users.db")
+        shutil.copyfile("users.db", db_path)
+        asyncio.run(main(db_path))
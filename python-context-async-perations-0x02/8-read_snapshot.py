@@ -0,0 +1,136 @@
+import sqlite3
+import aiosqlite
+
+# Any read of the file starts the read transaction and fixes its snapshot
+_PIN = "SELECT count(*) FROM sqlite_master"
+
+
+def _check_wal(mode, db_path, enable_wal):
+    if mode != "wal" and enable_wal:
+        raise sqlite3.OperationalError(f"could not switch {db_path} to WAL")
+    if mode != "wal":
+        raise sqlite3.OperationalError(
+            f"{db_path} is in {mode} mode; a read snapshot needs WAL, "
+            "otherwise it blocks writers")
+
+
+class ReadSnapshot:
+    def __init__(self, db_path, enable_wal=True):
+        """
+        Like DatabaseConnection, but every query in the with block reads
+        the same committed snapshot. The snapshot is pinned by a deferred
+        read transaction on entry; in WAL mode writers keep committing
+        meanwhile, the block just does not see their changes.
+        Args:
+            db_path (str): Path to the SQLite database.
+            enable_wal (bool): Switch the database to WAL mode if needed.
+                The mode is stored in the file, so this is a lasting change;
+                with False a non-WAL database raises OperationalError.
+        """
+        self.db_path = db_path
+        self.enable_wal = enable_wal
+        self.conn = None
+        self.cursor = None
+
+    def __enter__(self):
+        # Autocommit mode so the only transaction is the one begun here
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            if self.enable_wal:
+                mode = self.conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            else:
+                mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+            _check_wal(mode, self.db_path, self.enable_wal)
+            self.conn.execute("PRAGMA query_only = ON")
+            self.conn.execute("BEGIN DEFERRED")
+            self.conn.execute(_PIN).fetchone()
+        except BaseException:
+            self.conn.close()
+            raise
+        self.cursor = self.conn.cursor()
+        return self.cursor
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Nothing to commit; ending the transaction releases the snapshot
+        if self.conn:
+            self.cursor.close()
+            self.conn.execute("ROLLBACK")
+            self.conn.close()
+
+
+class AsyncReadSnapshot:
+    def __init__(self, db_path, enable_wal=True):
+        """async with counterpart of ReadSnapshot over aiosqlite; the block
+        gets a cursor whose queries all read the pinned snapshot."""
+        self.db_path = db_path
+        self.enable_wal = enable_wal
+        self.conn = None
+        self.cursor = None
+
+    async def __aenter__(self):
+        self.conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+        try:
+            pragma = "PRAGMA journal_mode = WAL" if self.enable_wal else "PRAGMA journal_mode"
+            async with self.conn.execute(pragma) as cursor:
+                mode = (await cursor.fetchone())[0]
+            _check_wal(mode, self.db_path, self.enable_wal)
+            await self.conn.execute("PRAGMA query_only = ON")
+            await self.conn.execute("BEGIN DEFERRED")
+            async with self.conn.execute(_PIN) as cursor:
+                await cursor.fetchone()
+        except BaseException:
+            await self.conn.close()
+            raise
+        self.cursor = await self.conn.cursor()
+        return self.cursor
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.conn:
+            await self.cursor.close()
+            await self.conn.execute("ROLLBACK")
+            await self.conn.close()
+
+
+if __name__ == "__main__":
+    import os
+    import shutil
+    import asyncio
+    import tempfile
+
+    def add_user(db_path, name):
+        # timeout=0: fails at once if the open snapshot were blocking writers
+        conn = sqlite3.connect(db_path, timeout=0)
+        try:
+            with conn:
+                conn.execute("INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                             (name, f"{name}@example.com", 30))
+        finally:
+            conn.close()
+
+    def count(cursor):
+        return cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        #### WAL is persistent, so work on a copy of users.db
+        db_path = os.path.join(tmp, "users.db")
+        shutil.copyfile("users.db", db_path)
+
+        #### a writer commits mid-report; the report stays consistent
+        with ReadSnapshot(db_path) as cursor:
+            before = count(cursor)
+            add_user(db_path, "during-report")
+            assert count(cursor) == before
+            print(f"report saw {before} users throughout")
+        with ReadSnapshot(db_path) as cursor:
+            print(f"next report sees {count(cursor)}")
+
+        async def report():
+            async with AsyncReadSnapshot(db_path) as cursor:
+                await cursor.execute("SELECT COUNT(*) FROM users")
+                before = (await cursor.fetchone())[0]
+                await asyncio.to_thread(add_user, db_path, "during-async-report")
+                await cursor.execute("SELECT COUNT(*) FROM users")
+                assert (await cursor.fetchone())[0] == before
+                print(f"async report saw {before} users throughout")
+
+        asyncio.run(report())
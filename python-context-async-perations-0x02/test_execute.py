@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit tests for `1-execute.py`.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+_execute = __import__('1-execute')
+
+
+class TestStreamingMemory(unittest.TestCase):
+    """
+    Streaming keeps peak memory bounded by `arraysize`, not by the size
+    of the result set.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """A scratch users table of 100,000 rows."""
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.tmp.name, "users.db")
+        conn = sqlite3.connect(cls.db_path)
+        try:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                         "name TEXT, email TEXT, age INTEGER)")
+            conn.executemany(
+                "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                ((f"user{i}", f"user{i}@example.com", 18 + i % 80)
+                 for i in range(100_000)))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the scratch database."""
+        cls.tmp.cleanup()
+
+    def peak(self, query, stream):
+        """Rows read and peak traced bytes for one ExecuteQuery run."""
+        return _execute._peak_memory(self.db_path, query, stream=stream)
+
+    def test_stream_does_not_grow_with_rows(self):
+        """10x the rows streamed stays well under 2x the peak."""
+        small_count, small = self.peak(
+            "SELECT * FROM users LIMIT 10000", stream=True)
+        large_count, large = self.peak("SELECT * FROM users", stream=True)
+        self.assertEqual((small_count, large_count), (10_000, 100_000))
+        self.assertLess(large, 2 * small)
+
+    def test_stream_below_fetchall(self):
+        """Streaming peaks far below materialising every row."""
+        streamed = self.peak("SELECT * FROM users", stream=True)[1]
+        fetched = self.peak("SELECT * FROM users", stream=False)[1]
+        self.assertLess(streamed * 10, fetched)
+
+
+
+class TestEnterCleanup(unittest.TestCase):
+    """
+    A query that fails in __enter__ still closes its connection.
+    """
+    def setUp(self):
+        """A scratch users table with a NOT NULL name."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "users.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                     "name TEXT NOT NULL)")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Remove the scratch database."""
+        self.tmp.cleanup()
+
+    def assertClosed(self, query, params, error):
+        """Running `query` raises `error` and leaves the connection
+        closed."""
+        execute = _execute.ExecuteQuery(self.db_path, query, params)
+        with self.assertRaises(error):
+            with execute:
+                pass
+        with self.assertRaises(sqlite3.ProgrammingError):
+            execute.conn.execute("SELECT 1")
+
+    def test_programming_error(self):
+        """Wrong number of bindings."""
+        self.assertClosed("SELECT * FROM users WHERE id = ?", (1, 2),
+                          sqlite3.ProgrammingError)
+
+    def test_integrity_error(self):
+        """A write that breaks a constraint."""
+        self.assertClosed("INSERT INTO users (name) VALUES (?)", (None,),
+                          sqlite3.IntegrityError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,96 @@
+import gzip
+import json
+import time
+import asyncio
+import threading
+import collections
 import sqlite3
+import aiosqlite
+import inspect
 import functools
 from datetime import datetime
 
+# Shared by the sync and async paths of log_queries
+query_metrics = {"count": 0, "total_time": 0.0}
+# Recent (query, params, seconds) records, e.g. for the index advisor
+captured_queries = collections.deque(maxlen=10000)
+# Set with start_recording() to also write every query to a workload log
+recorder = None
+
+
+class WorkloadRecorder:
+    def __init__(self, path):
+        """
+        Appends one gzip-compressed JSON line per query:
+        [start offset in seconds, duration, thread name, query, params].
+        Repeated query text compresses to almost nothing.
+        """
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def record(self, query, params, started, elapsed):
+        line = json.dumps([
+            round(started - self._origin, 6), round(elapsed, 6),
+            threading.current_thread().name, query, list(params or ()),
+        ], separators=(",", ":"), default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def start_recording(path):
+    global recorder
+    stop_recording()
+    recorder = WorkloadRecorder(path)
+    return recorder
+
+def stop_recording():
+    global recorder
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+
 #### decorator to log SQL queries
 
 def log_queries(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
+    def before(args, kwargs):
         query = args[0] if args else kwargs.get('query', '')
         print(f"Executing query: {query} at {datetime.now()}")
-        return func(*args, **kwargs)
+        return time.perf_counter()
+
+    def after(args, kwargs, started):
+        elapsed = time.perf_counter() - started
+        query = args[0] if args else kwargs.get('query', '')
+        params = kwargs.get('params', args[1] if len(args) > 1 else ())
+        query_metrics["count"] += 1
+        query_metrics["total_time"] += elapsed
+        captured_queries.append((query, params, elapsed))
+        active = recorder
+        if active is not None:
+            active.record(query, params, started, elapsed)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = before(args, kwargs)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                after(args, kwargs, started)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = before(args, kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            after(args, kwargs, started)
     return wrapper
 
 @log_queries
@@ -21,6 +102,17 @@ def fetch_all_users(query):
     conn.close()
     return results
 
-#### fetch users while logging the query
-users = fetch_all_users(query="SELECT * FROM users")
-print(users)
\ No newline at end of file
+@log_queries
+async def async_fetch_all_users(query):
+    async with aiosqlite.connect('users.db') as conn:
+        async with conn.execute(query) as cursor:
+            return await cursor.fetchall()
+
+if __name__ == "__main__":
+    #### fetch users while logging the query
+    users = fetch_all_users(query="SELECT * FROM users")
+    print(users)
+
+    #### the async path is logged and counted the same way
+    users = asyncio.run(async_fetch_all_users(query="SELECT * FROM users"))
+    print(query_metrics)
@@ -1,9 +1,141 @@
+import queue
+import asyncio
 import sqlite3 
+import inspect
+import threading
 import functools
+import contextlib
+import aiosqlite
+
+
+class ConnectionPool:
+    def __init__(self, db_path='users.db', size=5, timeout=None):
+        """
+        Fixed-size pool of sqlite3 connections shared between threads.
+        Args:
+            db_path (str): Path to the SQLite database.
+            size (int): Most connections open at once.
+            timeout (float): Seconds acquire() waits for a free connection
+                before raising TimeoutError; None waits forever.
+        """
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"no free connection to {self.db_path}")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return sqlite3.connect(self.db_path, check_same_thread=False)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class AsyncConnectionPool:
+    def __init__(self, db_path='users.db', size=5):
+        """
+        Fixed-size pool of aiosqlite connections.
+        Args:
+            db_path (str): Path to the SQLite database.
+            size (int): Most connections open at once.
+        """
+        self.db_path = db_path
+        self.size = size
+        self._idle = []
+        self._slots = None
+        self._loop = None
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio primitives are bound to one loop; idle connections
+            # are not, so they carry over to a new asyncio.run()
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.size)
+        await self._slots.acquire()
+        try:
+            if self._idle:
+                return self._idle.pop()
+            return await aiosqlite.connect(self.db_path)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn):
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            self._idle.append(conn)
+        except Exception:
+            await conn.close()
+        finally:
+            self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        # aiosqlite runs each connection on a non-daemon thread, so idle
+        # connections must be closed before the interpreter can exit
+        while self._idle:
+            await self._idle.pop().close()
+
+
+async_pool = AsyncConnectionPool('users.db')
 
 def with_db_connection(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if args and isinstance(args[0], aiosqlite.Connection):
+                # Already inside a unit of work; reuse its connection
+                return await func(*args, **kwargs)
+            async with async_pool.connection() as conn:
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        if args and isinstance(args[0], sqlite3.Connection):
+            # Already inside a unit of work; reuse its connection
+            return func(*args, **kwargs)
         conn = sqlite3.connect('users.db')
         try:
             return func(conn, *args, **kwargs)
@@ -16,7 +148,22 @@ def get_user_by_id(conn, user_id):
     cursor = conn.cursor() 
     cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,)) 
     return cursor.fetchone() 
-#### Fetch user by ID with automatic connection handling 
 
-user = get_user_by_id(user_id=1)
-print(user)
\ No newline at end of file
+@with_db_connection
+async def async_get_user_by_id(conn, user_id):
+    async with conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+        return await cursor.fetchone()
+
+async def main():
+    try:
+        print(await asyncio.gather(*(async_get_user_by_id(user_id=i) for i in (1, 2, 3))))
+    finally:
+        await async_pool.close()
+
+if __name__ == "__main__":
+    #### Fetch user by ID with automatic connection handling 
+    user = get_user_by_id(user_id=1)
+    print(user)
+
+    #### Same lookups from coroutines, sharing pooled connections
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import os
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+
+def load_workload(path):
+    """Read a log written by 0-log_queries.WorkloadRecorder into
+    (offset, duration, thread, query, params) tuples ordered by offset."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        records = [tuple(json.loads(line)) for line in f if line.strip()]
+    records.sort(key=lambda record: record[0])
+    return records
+
+
+def parse_target(spec):
+    """'users.db' or 'users.db:cache_size=-64000,mmap_size=268435456'
+    -> (path, {pragma: value})."""
+    path, _, options = spec.partition(":")
+    pragmas = dict(option.split("=", 1) for option in options.split(",") if option)
+    return path, pragmas
+
+
+def replay(records, db_path, pragmas=None, speed=1.0, concurrency=4, in_place=False):
+    """
+    Re-execute `records` against `db_path` and return each query's latency
+    in seconds, in log order.
+    Args:
+        speed (float): 1.0 keeps the recorded spacing, 10 replays ten times
+            faster, None or 0 issues queries as fast as workers free up.
+        concurrency (int): Worker threads, each with its own connection.
+        in_place (bool): Replay against db_path itself. By default a scratch
+            copy is used so recorded writes do not change the database.
+    """
+    pragmas = pragmas or {}
+    latencies = [None] * len(records)
+    local = threading.local()
+    connections = []
+    lock = threading.Lock()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = db_path
+        if not in_place:
+            target = os.path.join(tmp, "replay.db")
+            source, scratch = sqlite3.connect(db_path), sqlite3.connect(target)
+            source.backup(scratch)
+            scratch.close()
+            source.close()
+
+        def connection():
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                conn = local.conn = sqlite3.connect(
+                    target, timeout=30, check_same_thread=False)
+                for name, value in pragmas.items():
+                    conn.execute(f"PRAGMA {name} = {value}")
+                with lock:
+                    connections.append(conn)
+            return conn
+
+        def run(index, query, params):
+            conn = connection()
+            started = time.perf_counter()
+            try:
+                conn.execute(query, params).fetchall()
+                if conn.in_transaction:
+                    conn.commit()
+            except sqlite3.Error as e:
+                print(f"replay of {query!r} failed: {e}", file=sys.stderr)
+            latencies[index] = time.perf_counter() - started
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                origin = time.perf_counter()
+                for index, (offset, _, _, query, params) in enumerate(records):
+                    if speed:
+                        delay = offset / speed - (time.perf_counter() - origin)
+                        if delay > 0:
+                            time.sleep(delay)
+                    pool.submit(run, index, query, params)
+        finally:
+            for conn in connections:
+                conn.close()
+    return latencies
+
+
+def summarize(latencies):
+    latencies = sorted(value for value in latencies if value is not None)
+    if not latencies:
+        return {"count": 0}
+    if len(latencies) == 1:
+        cuts = latencies * 99
+    else:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "count": len(latencies),
+        "mean": statistics.fmean(latencies),
+        "p50": cuts[49],
+        "p90": cuts[89],
+        "p99": cuts[98],
+        "max": latencies[-1],
+    }
+
+
+def compare(records, targets, **options):
+    """Replay the same records against each target spec and summarize."""
+    return {spec: summarize(replay(records, *parse_target(spec), **options))
+            for spec in targets}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded query workload and compare latency.")
+    parser.add_argument("log", help="workload log from start_recording()")
+    parser.add_argument("targets", nargs="+",
+                        help="database file, optionally path:pragma=value,...")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="time acceleration, 0 for as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--in-place", action="store_true",
+                        help="replay against the targets instead of copies")
+    args = parser.parse_args(argv)
+
+    records = load_workload(args.log)
+    results = compare(records, args.targets, speed=args.speed,
+                      concurrency=args.concurrency, in_place=args.in_place)
+    baseline = None
+    print(f"{'target':<40} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9} {'p99 vs first':>13}")
+    for spec, stats in results.items():
+        if not stats["count"]:
+            print(f"{spec:<40} {0:>6}")
+            continue
+        baseline = baseline or stats["p99"]
+        print(f"{spec:<40} {stats['count']:>6} {stats['p50'] * 1e3:>9.3f} "
+              f"{stats['p90'] * 1e3:>9.3f} {stats['p99'] * 1e3:>9.3f} "
+              f"{stats['max'] * 1e3:>9.3f} {stats['p99'] / baseline:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
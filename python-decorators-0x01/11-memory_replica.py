@@ -0,0 +1,183 @@
+import time
+import sqlite3
+import functools
+import contextlib
+import itertools
+import threading
+
+_replica_ids = itertools.count()
+
+
+class MemoryReplica:
+    def __init__(self, db_path="users.db", refresh_interval=60.0,
+                 poll_interval=0.5):
+        """
+        Read-only in-memory copy of a database file, loaded with the SQLite
+        backup API. A background thread reloads it when another connection
+        commits to the file (PRAGMA data_version changes) or when it is
+        older than `refresh_interval` seconds. Writes must still go to the
+        file, e.g. through with_db_connection. Reader connections are
+        checked out per read; one still in use keeps its copy alive until
+        it is returned, then it is closed, so an old copy only lives as
+        long as the reads already running on it.
+        Args:
+            db_path (str): Database file to replicate.
+            refresh_interval (float): Reload at least this often; None only
+                reloads on change.
+            poll_interval (float): Seconds between data_version checks;
+                None disables the background thread.
+        """
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.refreshes = 0
+        self._name = f"replica_{next(_replica_ids)}"
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._idle = []  # reader connections to the current copy
+        self._stop = threading.Event()
+        # data_version only changes for commits made by *other* connections,
+        # so one long-lived connection watches the file
+        self._watch = sqlite3.connect(db_path, check_same_thread=False)
+        self._holder = None
+        self._current = None  # (generation, uri)
+        self.refresh()
+        self._poller = None
+        if poll_interval:
+            self._poller = threading.Thread(
+                target=self._poll, name="memory-replica", daemon=True)
+            self._poller.start()
+
+    def refresh(self):
+        """Load a fresh copy and switch new reads over to it."""
+        # The copy is made outside self._lock so reads keep going against
+        # the current generation meanwhile; _refresh_lock keeps two
+        # refreshes from building the same generation
+        with self._refresh_lock:
+            with self._lock:
+                version = self._data_version()
+                generation = self._current[0] + 1 if self._current else 0
+            uri = f"file:{self._name}_{generation}?mode=memory&cache=shared"
+            # The holder keeps this generation alive while readers switch
+            holder = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            source = sqlite3.connect(self.db_path)
+            try:
+                source.backup(holder)
+            except BaseException:
+                holder.close()
+                raise
+            finally:
+                source.close()
+            with self._lock:
+                old, self._holder = self._holder, holder
+                idle, self._idle = self._idle, []
+                self._current = (generation, uri)
+                self._version = version
+                self._loaded_at = time.monotonic()
+                self.refreshes += 1
+        # Nobody is using idle connections; checked-out ones are closed on
+        # return and keep the old copy alive until then
+        for conn in idle:
+            conn.close()
+        if old is not None:
+            old.close()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Check out a read-only connection to the current copy."""
+        # Under the lock so refresh() cannot drop this generation's holder
+        # between reading its URI and connecting to it
+        with self._lock:
+            generation, uri = self._current
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                conn.execute("PRAGMA query_only = ON")
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if generation == self._current[0]:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def execute(self, query, params=()):
+        with self.connection() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def close(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join()
+        with self._lock:
+            idle, self._idle = self._idle, []
+            if self._holder is not None:
+                self._holder.close()
+                self._holder = None
+            self._watch.close()
+        for conn in idle:
+            conn.close()
+
+    def _data_version(self):
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                with self._lock:
+                    changed = self._data_version() != self._version
+                    stale = (self.refresh_interval is not None and
+                             time.monotonic() - self._loaded_at
+                             >= self.refresh_interval)
+                if changed or stale:
+                    self.refresh()
+            except sqlite3.Error as e:
+                print(f"Replica refresh failed: {e}")
+
+
+def with_replica_connection(replica):
+    """Like with_db_connection, but injects a read-only connection to the
+    in-memory replica."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with replica.connection() as conn:
+                return func(conn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        #### work on a copy so the demo write leaves users.db untouched
+        db_path = os.path.join(tmp, "users.db")
+        shutil.copyfile("users.db", db_path)
+        replica = MemoryReplica(db_path, poll_interval=0.05)
+
+        @with_replica_connection(replica)
+        def fetch_user_age(conn, user_id):
+            return conn.execute("SELECT age FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+
+        def set_user_age(user_id, age):
+            conn = sqlite3.connect(db_path)
+            try:
+                conn.execute("UPDATE users SET age = ? WHERE id = ?", (age, user_id))
+                conn.commit()
+            finally:
+                conn.close()
+
+        #### reads come from memory; a write to the file shows up once the
+        #### poller sees data_version change
+        age = fetch_user_age(user_id=1)
+        set_user_age(user_id=1, age=age + 1)
+        time.sleep(0.2)
+        print(f"age {age} -> {fetch_user_age(user_id=1)} after "
+              f"{replica.refreshes} load(s)")
+        replica.close()
@@ -0,0 +1,211 @@
+import zlib
+import heapq
+import sqlite3
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+USERS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        age INTEGER NOT NULL
+    )
+'''
+
+
+def shard_of(user_id, shards):
+    # crc32 rather than hash() so every process routes an id the same way
+    return zlib.crc32(str(user_id).encode()) % shards
+
+
+class ShardedDB:
+    def __init__(self, paths, max_workers=None):
+        """
+        Users split across several SQLite files by id hash. Point lookups
+        touch one shard; scans, aggregates and broad writes run on every
+        shard in parallel on a thread pool and are merged here.
+        Args:
+            paths (list): One database file per shard, in shard order.
+            max_workers (int): Pool threads; defaults to one per shard.
+        """
+        self.paths = list(paths)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.paths),
+            thread_name_prefix="shard")
+
+    @classmethod
+    def split(cls, source="users.db", shards=4, prefix="users_shard", **kwargs):
+        """Create `prefix_N.db` files from the users table in `source`,
+        replacing their contents, and return a ShardedDB over them."""
+        paths = [f"{prefix}_{i}.db" for i in range(shards)]
+        buckets = [[] for _ in paths]
+        conn = sqlite3.connect(source)
+        try:
+            for row in conn.execute("SELECT id, name, email, age FROM users"):
+                buckets[shard_of(row[0], shards)].append(row)
+        finally:
+            conn.close()
+        for path, rows in zip(paths, buckets):
+            conn = sqlite3.connect(path)
+            try:
+                with conn:
+                    conn.execute(USERS_SCHEMA)
+                    conn.execute("DELETE FROM users")
+                    conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?)", rows)
+            finally:
+                conn.close()
+        return cls(paths, **kwargs)
+
+    def connection(self, shard):
+        """This thread's connection to one shard."""
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get(shard)
+        if conn is None:
+            conn = conns[shard] = sqlite3.connect(
+                self.paths[shard], timeout=30, check_same_thread=False)
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def connection_for(self, user_id):
+        return self.connection(shard_of(user_id, len(self.paths)))
+
+    def get_user(self, user_id):
+        return self.connection_for(user_id).execute(
+            "SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+    def scatter(self, query, params=()):
+        """Run a read on every shard concurrently; per-shard row lists."""
+        def run(shard):
+            return self.connection(shard).execute(query, params).fetchall()
+        return list(self._pool.map(run, range(len(self.paths))))
+
+    def query(self, query, params=(), order_key=None, reverse=False, limit=None):
+        """
+        Scatter-gather read. When the query has an ORDER BY, pass the same
+        ordering as `order_key` (a function of a row) so the already sorted
+        shard results are merged instead of re-sorted; a LIMIT in the query
+        is applied per shard, `limit` re-applies it to the merged rows.
+        """
+        results = self.scatter(query, params)
+        if order_key is None:
+            rows = itertools.chain.from_iterable(results)
+        else:
+            rows = heapq.merge(*results, key=order_key, reverse=reverse)
+        return list(itertools.islice(rows, limit))
+
+    def aggregate(self, query, params=(), combine=sum):
+        """
+        Run a single-row aggregate on every shard and combine each column
+        with `combine` (a function of the per-shard values, or a list of
+        them). COUNT/SUM combine with sum, MIN/MAX with min/max; compute
+        AVG from SUM and COUNT. A column that is NULL on every shard
+        combines to None.
+        """
+        rows = [result[0] for result in self.scatter(query, params)]
+        combiners = combine if isinstance(combine, (list, tuple)) else [combine] * len(rows[0])
+        combined = []
+        for fn, column in zip(combiners, zip(*rows)):
+            values = [value for value in column if value is not None]
+            # Like SQL, an aggregate over no rows is NULL
+            combined.append(fn(values) if values else None)
+        return tuple(combined)
+
+    def execute_all(self, query, params=()):
+        """Run one write on every shard concurrently; total rowcount."""
+        def run(shard):
+            conn = self.connection(shard)
+            with conn:
+                return conn.execute(query, params).rowcount
+        return sum(self._pool.map(run, range(len(self.paths))))
+
+    def write_many(self, query, rows, key=lambda row: row[0]):
+        """Route each parameter row to its shard by `key` (the user id) and
+        apply every shard's batch concurrently, one transaction per shard."""
+        batches = {}
+        for row in rows:
+            batches.setdefault(shard_of(key(row), len(self.paths)), []).append(row)
+
+        def run(shard):
+            conn = self.connection(shard)
+            with conn:
+                return conn.executemany(query, batches[shard]).rowcount
+        return sum(self._pool.map(run, list(batches)))
+
+    def close(self):
+        self._pool.shutdown()
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+def with_shard_connection(db, key="user_id"):
+    """Like with_db_connection, but injects the connection of the shard that
+    owns the `key` argument."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(db.connection_for(kwargs[key]), *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ShardedQuery:
+    def __init__(self, db, query, params=None, order_key=None, reverse=False,
+                 limit=None):
+        """ExecuteQuery counterpart for a ShardedDB: the with block gets the
+        merged rows from every shard."""
+        self.db = db
+        self.query = query
+        self.params = params or ()
+        self.order_key = order_key
+        self.reverse = reverse
+        self.limit = limit
+
+    def __enter__(self):
+        return self.db.query(self.query, self.params, self.order_key,
+                             self.reverse, self.limit)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ShardedDB.split("users.db", shards=4,
+                             prefix=os.path.join(tmp, "users_shard"))
+
+        @with_shard_connection(db)
+        def get_user_by_id(conn, user_id):
+            return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+        #### point lookup routed to one shard
+        print(get_user_by_id(user_id=1))
+
+        #### ordered scatter-gather scan
+        with ShardedQuery(db, "SELECT * FROM users WHERE age > ? ORDER BY age, id LIMIT 5",
+                          (25,), order_key=lambda row: (row[3], row[0]), limit=5) as rows:
+            for row in rows:
+                print(row)
+
+        #### aggregate merged across shards
+        count, total, oldest = db.aggregate(
+            "SELECT COUNT(*), SUM(age), MAX(age) FROM users", combine=[sum, sum, max])
+        print(f"{count} users, average age {total / count:.1f}, oldest {oldest}")
+
+        #### writes run on all shards at once
+        db.write_many("UPDATE users SET email = ? WHERE id = ?",
+                      [("a@example.com", 1), ("b@example.com", 2)], key=lambda row: row[1])
+        db.close()
@@ -1,29 +1,90 @@
-import sqlite3 
+import asyncio
+import inspect
 import functools
 
+_db = __import__('1-with_db_connection')
+with_db_connection = _db.with_db_connection
+
+# Nesting depth of active @transactional scopes, keyed by connection id
+_tx_depth = {}
+# Shared by the sync and async paths of transactional
+tx_metrics = {"commits": 0, "rollbacks": 0}
+
 """your code goes here"""
 def transactional(func):
+    def enter(conn):
+        key = id(conn)
+        depth = _tx_depth.get(key, 0)
+        _tx_depth[key] = depth + 1
+        return depth
+
+    def leave(conn, depth):
+        if depth:
+            _tx_depth[id(conn)] = depth
+        else:
+            del _tx_depth[id(conn)]
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            conn = args[0]
+            depth = enter(conn)
+            savepoint = f"tx_{depth}"
+            try:
+                if depth:
+                    await conn.execute(f"SAVEPOINT {savepoint}")
+                elif not conn.in_transaction:
+                    await conn.execute("BEGIN")
+                result = await func(*args, **kwargs)
+                if depth:
+                    await conn.execute(f"RELEASE {savepoint}")
+                else:
+                    await conn.commit()
+                    tx_metrics["commits"] += 1
+                return result
+            except BaseException as e:
+                if depth:
+                    await conn.execute(f"ROLLBACK TO {savepoint}")
+                    await conn.execute(f"RELEASE {savepoint}")
+                else:
+                    await conn.rollback()
+                    tx_metrics["rollbacks"] += 1
+                    print(f"Transaction failed: {e}")
+                raise
+            finally:
+                leave(conn, depth)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = args[0]  # Assuming the first argument is the connection
+        depth = enter(conn)
+        savepoint = f"tx_{depth}"
         try:
+            if depth:
+                # Nested scope: only roll back to here on error
+                conn.execute(f"SAVEPOINT {savepoint}")
+            elif not conn.in_transaction:
+                # Begin explicitly so nested savepoints can't commit early
+                conn.execute("BEGIN")
             result = func(*args, **kwargs)
-            conn.commit()  # Commit the transaction
+            if depth:
+                conn.execute(f"RELEASE {savepoint}")
+            else:
+                conn.commit()  # Only the outermost scope commits
+                tx_metrics["commits"] += 1
             return result
         except Exception as e:
-            conn.rollback()  # Rollback on error
-            print(f"Transaction failed: {e}")
+            if depth:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            else:
+                conn.rollback()  # Rollback on error
+                tx_metrics["rollbacks"] += 1
+                print(f"Transaction failed: {e}")
             raise
-    return wrapper
-
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
         finally:
-            conn.close()
+            leave(conn, depth)
     return wrapper
 
 @with_db_connection 
@@ -31,6 +92,42 @@ def with_db_connection(func):
 def update_user_email(conn, user_id, new_email): 
     cursor = conn.cursor() 
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id)) 
+
+@with_db_connection
+@transactional
+def update_user_emails(conn, pairs):
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE users SET email = ? WHERE id = ?",
+        ((new_email, user_id) for user_id, new_email in pairs)
+    )
+    return cursor.rowcount
+
+@with_db_connection
+@transactional
+def sync_user_emails(conn, pairs):
+    # Each nested update_user_email gets a savepoint; only this call commits
+    for user_id, new_email in pairs:
+        update_user_email(conn, user_id, new_email)
+
+@with_db_connection
+@transactional
+async def async_update_user_email(conn, user_id, new_email):
+    await conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+async def main():
+    try:
+        await async_update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+    finally:
+        await _db.async_pool.close()
+
+if __name__ == "__main__":
     #### Update user's email with automatic transaction handling 
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+
+    #### Bulk update in a single transaction
+    update_user_emails(pairs=[(1, 'Crawford_Cartwright@hotmail.com')])
 
-update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
\ No newline at end of file
+    #### Same update from a coroutine on a pooled connection
+    asyncio.run(main())
+    print(tx_metrics)
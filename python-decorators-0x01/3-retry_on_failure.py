@@ -1,29 +1,49 @@
 import time
-import sqlite3 
+import asyncio
+import inspect
 import functools
 
 #### paste your with_db_decorator here
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-    return wrapper
+_db = __import__('1-with_db_connection')
+with_db_connection = _db.with_db_connection
+
+# Shared by the sync and async paths of retry_on_failure
+retry_metrics = {"attempts": 0, "failures": 0, "exhausted": 0}
 
 def retry_on_failure(retries, delay):
     def decorator(func):
+        def failed(i, e):
+            retry_metrics["failures"] += 1
+            print(f"Attempt {i + 1} failed: {e}")
+
+        def exhausted():
+            retry_metrics["exhausted"] += 1
+            print("All attempts failed.")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for i in range(retries):
+                    retry_metrics["attempts"] += 1
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        failed(i, e)
+                        await asyncio.sleep(delay)
+                exhausted()
+                return None
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             for i in range(retries):
+                retry_metrics["attempts"] += 1
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    print(f"Attempt {i + 1} failed: {e}")
+                    failed(i, e)
                     time.sleep(delay)
-            print("All attempts failed.")
+            exhausted()
             return None
         return wrapper
     return decorator
@@ -35,7 +55,24 @@ def fetch_users_with_retry(conn):
     cursor.execute("SELECT * FROM users")
     return cursor.fetchall()
 
-#### attempt to fetch users with automatic retry on failure
+@with_db_connection
+@retry_on_failure(retries=3, delay=1)
+async def async_fetch_users_with_retry(conn):
+    async with conn.execute("SELECT * FROM users") as cursor:
+        return await cursor.fetchall()
+
+async def main():
+    try:
+        return await async_fetch_users_with_retry()
+    finally:
+        await _db.async_pool.close()
+
+if __name__ == "__main__":
+    #### attempt to fetch users with automatic retry on failure
+
+    users = fetch_users_with_retry()
+    print(users)
 
-users = fetch_users_with_retry()
-print(users)
\ No newline at end of file
+    #### same retry policy without blocking the event loop between attempts
+    users = asyncio.run(main())
+    print(retry_metrics)
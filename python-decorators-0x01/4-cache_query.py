@@ -1,31 +1,229 @@
 import time
-import sqlite3 
+import asyncio
+import inspect
 import functools
+import threading
+from concurrent.futures import Future
 
+_db = __import__('1-with_db_connection')
+with_db_connection = _db.with_db_connection
 
+
+# Shared by the sync and async paths of cache_query
 query_cache = {}
+_cached_at = {}    # query -> time.monotonic() when the result was stored
+_inflight = {}     # query -> Future of the caller currently running it
+_refreshing = set()
+_background = set()  # keeps async refresh tasks alive until they finish
+_cache_lock = threading.Lock()
+cache_metrics = {"hits": 0, "stale_hits": 0, "l2_hits": 0, "misses": 0,
+                 "coalesced": 0, "l2_errors": 0}
+_MISSING = object()
 
-"""your code goes here"""
-def cache_query(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        query = kwargs.get('query', args[0] if args else None)
+# Cache bookkeeping shared by cache_query and db_operation
+def _lookup(query, ttl=None, stale_ttl=0):
+    # Returns ("hit" | "stale" | "wait" | "lead", result or Future)
+    with _cache_lock:
         if query in query_cache:
-            print("Using cached result for query:", query)
-            return query_cache[query]
-        result = func(*args, **kwargs)
-        query_cache[query] = result
+            age = time.monotonic() - _cached_at[query]
+            if ttl is None or age < ttl:
+                cache_metrics["hits"] += 1
+                print("Using cached result for query:", query)
+                return "hit", query_cache[query]
+            if age < ttl + stale_ttl:
+                cache_metrics["stale_hits"] += 1
+                print("Using stale cached result for query:", query)
+                if query in _refreshing:
+                    return "hit", query_cache[query]
+                _refreshing.add(query)
+                return "stale", query_cache[query]
+        future = _inflight.get(query)
+        if future is not None:
+            cache_metrics["coalesced"] += 1
+            return "wait", future
+        cache_metrics["misses"] += 1
+        future = _inflight[query] = Future()
+        return "lead", future
+
+def _store(query, result):
+    query_cache[query] = result
+    _cached_at[query] = time.monotonic()
+
+class _Abandoned(Exception):
+    """The leader was cancelled or interrupted before its query finished."""
+
+def _finish(query, future, result=None, error=None):
+    # The leader hands its result (or error) to every coalesced waiter
+    with _cache_lock:
+        if error is None:
+            _store(query, result)
+        del _inflight[query]
+    if error is None:
+        future.set_result(result)
+    elif isinstance(error, Exception):
+        future.set_exception(error)
+    else:
+        # Cancellation or an interrupt ended the leader, not the query;
+        # the waiters look it up again and one of them runs it
+        future.set_exception(_Abandoned())
+
+def _refreshed(query, result=None, error=None):
+    with _cache_lock:
+        if error is None:
+            _store(query, result)
+        _refreshing.discard(query)
+    if error is not None:
+        print(f"Background refresh failed for query {query}: {error}")
+
+def _cached(query, ttl, stale_ttl, load, refresh):
+    # Sync flow: load() runs the query on a miss, refresh() re-runs it on
+    # a background thread after a stale hit
+    while True:
+        state, value = _lookup(query, ttl, stale_ttl)
+        if state == "stale":
+            threading.Thread(target=refresh, daemon=True).start()
+        if state in ("hit", "stale"):
+            return value
+        if state == "lead":
+            try:
+                result = load()
+            except BaseException as e:
+                _finish(query, value, error=e)
+                raise
+            _finish(query, value, result)
+            return result
+        # Another caller is already running this query; wait for it
+        try:
+            return value.result()
+        except _Abandoned:
+            pass
+
+async def _cached_async(query, ttl, stale_ttl, load, refresh):
+    # Async flow, same as _cached with coroutine functions load and refresh
+    while True:
+        state, value = _lookup(query, ttl, stale_ttl)
+        if state == "stale":
+            task = asyncio.get_running_loop().create_task(refresh())
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+        if state in ("hit", "stale"):
+            return value
+        if state == "lead":
+            try:
+                result = await load()
+            except BaseException as e:
+                _finish(query, value, error=e)
+                raise
+            _finish(query, value, result)
+            return result
+        try:
+            # The leader may be a thread or another coroutine; the shield
+            # keeps this waiter's cancellation off the shared future
+            waiting = asyncio.wrap_future(value)
+            # ...and if this waiter is gone, nobody reads the outcome
+            waiting.add_done_callback(lambda f: f.cancelled() or f.exception())
+            return await asyncio.shield(waiting)
+        except _Abandoned:
+            pass
+
+"""your code goes here"""
+def cache_query(func=None, *, ttl=None, stale_ttl=0, l2=None):
+    """
+    Cache results by query. Concurrent misses for the same query share one
+    database round trip. With `ttl`, an expired entry is still served for
+    `stale_ttl` more seconds while a single background refresh runs.
+    `l2` is an optional slower shared tier with get(key, default) and
+    set(key, value), e.g. PersistentCache, consulted before the database.
+    L2 failures are logged and counted but never fail the call: a failed
+    get falls through to the database, a failed set still returns the
+    fresh result.
+    """
+    if func is None:
+        return lambda f: cache_query(f, ttl=ttl, stale_ttl=stale_ttl, l2=l2)
+
+    def l2_failed(action, query, error):
+        with _cache_lock:
+            cache_metrics["l2_errors"] += 1
+        print(f"L2 cache {action} failed for query {query}: {error}")
+
+    def from_l2(query):
+        try:
+            result = l2.get(query, _MISSING)
+        except Exception as e:
+            l2_failed("get", query, e)
+            return _MISSING
+        if result is not _MISSING:
+            with _cache_lock:
+                cache_metrics["l2_hits"] += 1
+        return result
+
+    def to_l2(query, result):
+        try:
+            l2.set(query, result)
+        except Exception as e:
+            l2_failed("set", query, e)
+
+    def query_of(args, kwargs):
+        # args[0] is the connection injected by with_db_connection
+        return kwargs.get('query', args[1] if len(args) > 1 else None)
+
+    if inspect.iscoroutinefunction(func):
+        async def refresh_async(args, kwargs, query):
+            try:
+                result = await with_db_connection(func)(*args[1:], **kwargs)
+                if l2 is not None:
+                    await asyncio.to_thread(to_l2, query, result)
+            except Exception as e:
+                _refreshed(query, error=e)
+            else:
+                _refreshed(query, result)
+
+        async def load_async(args, kwargs, query):
+            result = _MISSING
+            if l2 is not None:
+                result = await asyncio.to_thread(from_l2, query)
+            if result is _MISSING:
+                result = await func(*args, **kwargs)
+                if l2 is not None:
+                    await asyncio.to_thread(to_l2, query, result)
+            return result
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            query = query_of(args, kwargs)
+            return await _cached_async(
+                query, ttl, stale_ttl,
+                functools.partial(load_async, args, kwargs, query),
+                functools.partial(refresh_async, args, kwargs, query))
+        return async_wrapper
+
+    def refresh(args, kwargs, query):
+        try:
+            # The caller's connection is closed by now; open a fresh one
+            result = with_db_connection(func)(*args[1:], **kwargs)
+            if l2 is not None:
+                to_l2(query, result)
+        except Exception as e:
+            _refreshed(query, error=e)
+        else:
+            _refreshed(query, result)
+
+    def load(args, kwargs, query):
+        result = _MISSING
+        if l2 is not None:
+            result = from_l2(query)
+        if result is _MISSING:
+            result = func(*args, **kwargs)
+            if l2 is not None:
+                to_l2(query, result)
         return result
-    return wrapper
 
-def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
+        query = query_of(args, kwargs)
+        return _cached(query, ttl, stale_ttl,
+                       functools.partial(load, args, kwargs, query),
+                       functools.partial(refresh, args, kwargs, query))
     return wrapper
 
 @with_db_connection
@@ -35,8 +233,25 @@ def fetch_users_with_cache(conn, query):
     cursor.execute(query)
     return cursor.fetchall()
 
-#### First call will cache the result
-users = fetch_users_with_cache(query="SELECT * FROM users")
+@with_db_connection
+@cache_query
+async def async_fetch_users_with_cache(conn, query):
+    async with conn.execute(query) as cursor:
+        return await cursor.fetchall()
+
+async def main():
+    try:
+        return await async_fetch_users_with_cache(query="SELECT * FROM users")
+    finally:
+        await _db.async_pool.close()
+
+if __name__ == "__main__":
+    #### First call will cache the result
+    users = fetch_users_with_cache(query="SELECT * FROM users")
+
+    #### Second call will use the cached result
+    users_again = fetch_users_with_cache(query="SELECT * FROM users")
 
-#### Second call will use the cached result
-users_again = fetch_users_with_cache(query="SELECT * FROM users")
\ No newline at end of file
+    #### Coroutines read the same cache
+    users_async = asyncio.run(main())
+    print(cache_metrics)
@@ -0,0 +1,212 @@
+import os
+import time
+import queue
+import shutil
+import sqlite3
+import tempfile
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    def __init__(self, db_path="users.db", max_batch=256, max_delay=0.0):
+        """
+        Applies write statements queued by many threads on a single writer
+        thread, committing each batch in one transaction. A batch is
+        everything queued while the previous one was committing, so it is
+        committed as soon as the queue is drained.
+        Args:
+            db_path (str): Path to the SQLite database.
+            max_batch (int): Most statements applied per transaction.
+            max_delay (float): Optional single wait, in seconds, for more
+                statements once the queue is drained. Only helps callers
+                that do not block on their result; callers waiting on
+                .result() cannot submit more until the batch commits.
+        """
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="group-commit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, query, params=()):
+        """Queue a statement; the future resolves to its rowcount once the
+        batch it belongs to has been committed."""
+        future = Future()
+        with self._lock:
+            if self._error is not None:
+                raise RuntimeError("GroupCommitWriter stopped") from self._error
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            self._queue.put((query, params, future))
+        return future
+
+    def close(self):
+        """Flush everything queued so far and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self):
+        try:
+            self._serve()
+        except BaseException as e:
+            self._fail(e)
+
+    def _serve(self):
+        # The connection is created here so it is only ever used by this thread
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                lingered = self.max_delay <= 0
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        if lingered:
+                            break
+                        lingered = True
+                        try:
+                            item = self._queue.get(timeout=self.max_delay)
+                        except queue.Empty:
+                            break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                try:
+                    self._apply(conn, batch)
+                except BaseException as e:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    raise
+        finally:
+            conn.close()
+
+    def _fail(self, error):
+        # The writer thread is gone: refuse new work and fail what is queued
+        with self._lock:
+            self._error = error
+            self._closed = True
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                item[2].set_exception(error)
+
+    def _apply(self, conn, batch):
+        # Each statement runs under its own savepoint so one bad statement
+        # only fails its own caller, not the whole batch
+        outcomes = []
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            for query, params, future in batch:
+                cursor.execute("SAVEPOINT stmt")
+                try:
+                    cursor.execute(query, params)
+                except sqlite3.Error as e:
+                    cursor.execute("ROLLBACK TO stmt")
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, cursor.rowcount, None))
+                cursor.execute("RELEASE stmt")
+            cursor.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            cursor.close()
+        for future, rowcount, error in outcomes:
+            if error is None:
+                future.set_result(rowcount)
+            else:
+                future.set_exception(error)
+
+
+def group_commit(writer):
+    """Queue the (query, params) returned by the decorated function on
+    `writer` and hand the caller a Future instead of committing inline."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            query, params = func(*args, **kwargs)
+            return writer.submit(query, params)
+        return wrapper
+    return decorator
+
+
+#### commit-per-call baseline, equivalent to @with_db_connection @transactional
+def update_user_email_per_call(db_path, user_id, new_email):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("UPDATE users SET email = ? WHERE id = ?",
+                     (new_email, user_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def benchmark(db_path, threads=8, writes_per_thread=200):
+    """Compare writes/sec for commit-per-call against group commit on a
+    scratch copy of `db_path`."""
+    total = threads * writes_per_thread
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = os.path.join(tmp, "bench.db")
+
+        def run(label, write):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(write, range(total)))
+            results[label] = total / (time.perf_counter() - start)
+
+        shutil.copyfile(db_path, scratch)
+        run("commit-per-call", lambda i: update_user_email_per_call(
+            scratch, i % 1000 + 1, f"user{i}@example.com"))
+
+        shutil.copyfile(db_path, scratch)
+        with GroupCommitWriter(scratch) as writer:
+            @group_commit(writer)
+            def update_user_email(user_id, new_email):
+                return ("UPDATE users SET email = ? WHERE id = ?",
+                        (new_email, user_id))
+
+            run("group-commit", lambda i: update_user_email(
+                i % 1000 + 1, f"user{i}@example.com").result())
+    return results
+
+
+if __name__ == "__main__":
+    #### burst of email updates from 8 threads, one fsync per batch
+    for label, rate in benchmark("users.db").items():
+        print(f"{label:>16}: {rate:,.0f} writes/sec")
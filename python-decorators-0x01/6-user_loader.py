@@ -0,0 +1,169 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_db = __import__('1-with_db_connection')
+with_db_connection = _db.with_db_connection
+
+# SQLite's historical default for SQLITE_MAX_VARIABLE_NUMBER; newer builds
+# allow more, but this is safe everywhere
+MAX_VARIABLES = 999
+
+
+def _chunks(user_ids):
+    for start in range(0, len(user_ids), MAX_VARIABLES):
+        chunk = user_ids[start:start + MAX_VARIABLES]
+        yield f"SELECT * FROM users WHERE id IN ({','.join('?' * len(chunk))})", chunk
+
+@with_db_connection
+def get_users_by_ids(conn, user_ids):
+    users = {}
+    cursor = conn.cursor()
+    for query, chunk in _chunks(list(user_ids)):
+        cursor.execute(query, chunk)
+        users.update((row[0], row) for row in cursor)
+    return users
+
+@with_db_connection
+async def async_get_users_by_ids(conn, user_ids):
+    users = {}
+    for query, chunk in _chunks(list(user_ids)):
+        async with conn.execute(query, chunk) as cursor:
+            users.update((row[0], row) for row in await cursor.fetchall())
+    return users
+
+
+class UserLoader:
+    def __init__(self, window=0.002):
+        """
+        Collects get_user_by_id lookups made by any thread within `window`
+        seconds and resolves them with one `WHERE id IN (...)` query.
+        Results are cached for the loader's lifetime, so create one loader
+        per request.
+        """
+        self.window = window
+        self.batches = 0
+        self._cache = {}     # user_id -> Future
+        self._pending = {}   # user_id -> Future not yet dispatched
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _future(self, user_id):
+        with self._lock:
+            future = self._cache.get(user_id)
+            if future is None:
+                future = self._cache[user_id] = Future()
+                self._pending[user_id] = future
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self._dispatch)
+                    self._timer.daemon = True
+                    self._timer.start()
+            return future
+
+    def load(self, user_id):
+        return self._future(user_id).result()
+
+    def load_many(self, user_ids):
+        futures = [self._future(user_id) for user_id in user_ids]
+        # Everything this caller needs is queued; no reason to wait
+        self._dispatch()
+        return [future.result() for future in futures]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _dispatch(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            pending, self._pending, self._timer = self._pending, {}, None
+            if pending:
+                self.batches += 1
+        if not pending:
+            return
+        try:
+            users = get_users_by_ids(list(pending))
+        except Exception as e:
+            with self._lock:
+                for user_id in pending:
+                    self._cache.pop(user_id, None)
+            for future in pending.values():
+                future.set_exception(e)
+        else:
+            for user_id, future in pending.items():
+                future.set_result(users.get(user_id))
+
+
+class AsyncUserLoader:
+    def __init__(self, window=0):
+        """
+        Coroutine counterpart of UserLoader. With `window=0` the ids
+        requested during the current event-loop tick form one batch.
+        """
+        self.window = window
+        self.batches = 0
+        self._cache = {}
+        self._pending = {}
+        self._scheduled = False
+        self._tasks = set()
+
+    async def load(self, user_id):
+        future = self._cache.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._cache[user_id] = loop.create_future()
+            self._pending[user_id] = future
+            if not self._scheduled:
+                self._scheduled = True
+                if self.window:
+                    loop.call_later(self.window, self._start_dispatch)
+                else:
+                    loop.call_soon(self._start_dispatch)
+        # Shielded so one cancelled caller doesn't cancel the shared lookup
+        return await asyncio.shield(future)
+
+    async def load_many(self, user_ids):
+        return await asyncio.gather(*(self.load(user_id) for user_id in user_ids))
+
+    def clear(self):
+        self._cache.clear()
+
+    def _start_dispatch(self):
+        task = asyncio.get_running_loop().create_task(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self):
+        pending, self._pending, self._scheduled = self._pending, {}, False
+        self.batches += 1
+        try:
+            users = await async_get_users_by_ids(list(pending))
+        except Exception as e:
+            for user_id, future in pending.items():
+                self._cache.pop(user_id, None)
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for user_id, future in pending.items():
+                if not future.done():
+                    future.set_result(users.get(user_id))
+
+
+async def main():
+    loader = AsyncUserLoader()
+    try:
+        users = await asyncio.gather(*(loader.load(i) for i in range(1, 51)))
+        print(f"async: {len(users)} users in {loader.batches} query batch(es)")
+    finally:
+        await _db.async_pool.close()
+
+if __name__ == "__main__":
+    #### 50 threads each asking for one user share a handful of IN queries
+    loader = UserLoader()
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        users = list(pool.map(loader.load, range(1, 51)))
+    print(f"sync: {len(users)} users in {loader.batches} query batch(es)")
+
+    #### same from coroutines, batched per event-loop tick
+    asyncio.run(main())
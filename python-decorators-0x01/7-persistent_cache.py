@@ -0,0 +1,140 @@
+import time
+import zlib
+import pickle
+import sqlite3
+import threading
+
+_MISSING = object()
+
+
+class PersistentCache:
+    def __init__(self, path="query_cache.db", max_bytes=64 * 1024 * 1024,
+                 ttl=None, compress_over=1024):
+        """
+        On-disk result cache in its own SQLite file, meant to sit under
+        cache_query's in-memory dict as an L2 that survives restarts and is
+        shared by every process on the host that opens the same file.
+        Args:
+            path (str): Cache database file (not users.db).
+            max_bytes (int): Total stored value size before least recently
+                used entries are evicted.
+            ttl (float): Default seconds an entry stays valid; None keeps
+                entries until evicted.
+            compress_over (int): Pickles larger than this many bytes are
+                zlib-compressed; None disables compression.
+        Values are pickled, so only share the file between trusted processes.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compress_over = compress_over
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        # WAL lets other processes keep reading while one of them writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                compressed INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, compressed, expires_at FROM cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, compressed, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return default
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        if compressed:
+            value = zlib.decompress(value)
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl=_MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        compressed = (self.compress_over is not None
+                      and len(data) > self.compress_over)
+        if compressed:
+            data = zlib.compress(data)
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, data, int(compressed), len(data), expires_at, now))
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, now):
+        self._conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,))
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk least recently used entries until enough bytes are freed
+        victims = []
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM cache ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+
+if __name__ == "__main__":
+    _cq = __import__('4-cache_query')
+
+    l2 = PersistentCache()
+
+    @_cq.with_db_connection
+    @_cq.cache_query(l2=l2)
+    def fetch_users_with_cache(conn, query):
+        cursor = conn.cursor()
+        cursor.execute(query)
+        return cursor.fetchall()
+
+    #### a cold process reads from the L2 file if an earlier run filled it
+    users = fetch_users_with_cache(query="SELECT * FROM users")
+    print(_cq.cache_metrics, f"L2 holds {l2.total_bytes()} bytes")
@@ -0,0 +1,219 @@
+import io
+import time
+import sqlite3
+import asyncio
+import inspect
+import timeit
+import functools
+import contextlib
+
+_db = __import__('1-with_db_connection')
+_tx = __import__('2-transactional')
+_retry = __import__('3-retry_on_failure')
+_cache = __import__('4-cache_query')
+
+
+def db_operation(pool=None, retry=None, tx=False, cache=None):
+    """
+    Build one wrapper equivalent to stacking with_db_connection,
+    retry_on_failure, transactional and cache_query, without a frame and
+    argument repack per layer. The layers always apply in the order:
+    cache lookup, then retry, then a fresh connection per attempt, then
+    the transaction, so a retry never reuses a broken connection and a
+    cache hit never touches the pool. Caching goes through cache_query's
+    own bookkeeping (single-flight, stale window, lock), and retry_metrics,
+    tx_metrics and cache_metrics are updated as the stacked decorators
+    would.
+    Args:
+        pool: Object with acquire()/release(conn) (awaitable for async
+            functions), e.g. ConnectionPool. None opens a new connection
+            to users.db per call, or uses the shared async_pool.
+        retry: Attempts as an int, or (retries, delay) like
+            retry_on_failure. Unlike retry_on_failure, the last error is
+            re-raised instead of returning None. Without it the call runs
+            once and retry_metrics are left alone.
+        tx (bool): Run the call in a transaction; nested calls that are
+            handed a connection use savepoints via transactional.
+        cache: True, or {"ttl": seconds, "stale_ttl": seconds}, to cache
+            by query in cache_query's shared query_cache (no L2 tier).
+    """
+    retries, delay = retry if isinstance(retry, tuple) else (retry or 1, 0)
+    use_cache = bool(cache)
+    options = cache if isinstance(cache, dict) else {}
+    ttl, stale_ttl = options.get("ttl"), options.get("stale_ttl", 0)
+    depth = _tx._tx_depth
+    retry_metrics, tx_metrics = _retry.retry_metrics, _tx.tx_metrics
+
+    def query_of(args, kwargs):
+        return kwargs.get('query', args[0] if args else None)
+
+    def attempt_started():
+        if retry is not None:
+            retry_metrics["attempts"] += 1
+
+    def attempt_failed(attempt, e):
+        # Without `retry` there is no retry layer to report on
+        if retry is None:
+            return
+        retry_metrics["failures"] += 1
+        print(f"Attempt {attempt + 1} failed: {e}")
+        if attempt + 1 == retries:
+            retry_metrics["exhausted"] += 1
+            print("All attempts failed.")
+
+    def rolled_back(e):
+        tx_metrics["rollbacks"] += 1
+        print(f"Transaction failed: {e}")
+
+    def decorator(func):
+        # A caller that already holds a connection joins its unit of work
+        nested = _tx.transactional(func) if tx else func
+
+        if inspect.iscoroutinefunction(func):
+            async_pool = _db.async_pool if pool is None else pool
+
+            async def run(args, kwargs):
+                for attempt in range(retries):
+                    attempt_started()
+                    conn = await async_pool.acquire()
+                    try:
+                        if tx:
+                            depth[id(conn)] = 1
+                            await conn.execute("BEGIN")
+                        result = await func(conn, *args, **kwargs)
+                        if tx:
+                            await conn.commit()
+                            tx_metrics["commits"] += 1
+                        return result
+                    except Exception as e:
+                        if tx:
+                            await conn.rollback()
+                            rolled_back(e)
+                        attempt_failed(attempt, e)
+                        if attempt + 1 == retries:
+                            raise
+                        await asyncio.sleep(delay)
+                    finally:
+                        if tx:
+                            del depth[id(conn)]
+                        await async_pool.release(conn)
+
+            async def refresh_async(args, kwargs, query):
+                try:
+                    result = await run(args, kwargs)
+                except Exception as e:
+                    _cache._refreshed(query, error=e)
+                else:
+                    _cache._refreshed(query, result)
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if args and isinstance(args[0], _db.aiosqlite.Connection):
+                    return await nested(*args, **kwargs)
+                if not use_cache:
+                    return await run(args, kwargs)
+                query = query_of(args, kwargs)
+                return await _cache._cached_async(
+                    query, ttl, stale_ttl,
+                    functools.partial(run, args, kwargs),
+                    functools.partial(refresh_async, args, kwargs, query))
+            return async_wrapper
+
+        if pool is None:
+            acquire, release = functools.partial(sqlite3.connect, 'users.db'), sqlite3.Connection.close
+        else:
+            acquire, release = pool.acquire, pool.release
+
+        def run(args, kwargs):
+            for attempt in range(retries):
+                attempt_started()
+                conn = acquire()
+                try:
+                    if tx:
+                        depth[id(conn)] = 1
+                        conn.execute("BEGIN")
+                    result = func(conn, *args, **kwargs)
+                    if tx:
+                        conn.commit()
+                        tx_metrics["commits"] += 1
+                    return result
+                except Exception as e:
+                    if tx:
+                        conn.rollback()
+                        rolled_back(e)
+                    attempt_failed(attempt, e)
+                    if attempt + 1 == retries:
+                        raise
+                    time.sleep(delay)
+                finally:
+                    if tx:
+                        del depth[id(conn)]
+                    release(conn)
+
+        def refresh(args, kwargs, query):
+            try:
+                result = run(args, kwargs)
+            except Exception as e:
+                _cache._refreshed(query, error=e)
+            else:
+                _cache._refreshed(query, result)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if args and isinstance(args[0], sqlite3.Connection):
+                return nested(*args, **kwargs)
+            if not use_cache:
+                return run(args, kwargs)
+            query = query_of(args, kwargs)
+            return _cache._cached(
+                query, ttl, stale_ttl,
+                functools.partial(run, args, kwargs),
+                functools.partial(refresh, args, kwargs, query))
+        return wrapper
+    return decorator
+
+def _select_one(conn, query):
+    return conn.execute(query).fetchall()
+
+def benchmark(number=2000):
+    """Per-call microseconds of the stacked decorators against db_operation
+    for the same work."""
+    pool = _db.ConnectionPool(size=1)
+    query = "SELECT 1"
+    variants = {
+        "stacked conn+retry+tx": _db.with_db_connection(
+            _retry.retry_on_failure(retries=3, delay=0)(
+                _tx.transactional(_select_one))),
+        "db_operation conn+retry+tx": db_operation(
+            retry=(3, 0), tx=True)(_select_one),
+        "db_operation pooled+retry+tx": db_operation(
+            pool=pool, retry=(3, 0), tx=True)(_select_one),
+        "stacked cache hit": _db.with_db_connection(
+            _cache.cache_query(_select_one)),
+        "db_operation cache hit": db_operation(cache=True)(_select_one),
+    }
+    results = {}
+    # cache_query prints on every hit; keep that out of the numbers
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, fn in variants.items():
+            fn(query=query)
+            seconds = timeit.timeit(lambda: fn(query=query), number=number)
+            results[label] = seconds / number * 1e6
+    pool.close()
+    return results
+
+@db_operation(retry=(3, 1), tx=True)
+def update_user_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+@db_operation(cache={"ttl": 60})
+def fetch_users(conn, query):
+    return conn.execute(query).fetchall()
+
+if __name__ == "__main__":
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+    users = fetch_users(query="SELECT * FROM users")
+
+    #### per-call overhead, stacked layers vs one composed wrapper
+    for label, micros in benchmark().items():
+        print(f"{label:>30}: {micros:8.1f} us/call")
@@ -0,0 +1,236 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import tempfile
+import collections
+
+Proposal = collections.namedtuple(
+    "Proposal",
+    "statement table columns fingerprints calls total_time estimated_saving")
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_WHERE = re.compile(
+    r"\bWHERE\b(.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|$)", re.I | re.S)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b(.*?)(?:\bLIMIT\b|$)", re.I | re.S)
+_PREDICATE = re.compile(
+    r"\b(\w+)\s*(==|=|<=|>=|<>|!=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b)", re.I)
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_TABLE_ACCESS = re.compile(r"^(?:SCAN|SEARCH) (\w+)")
+_EQUALITY = {"=", "==", "IN", "IS"}
+_RANGE = {"<", ">", "<=", ">=", "BETWEEN"}
+
+
+def fingerprint(query):
+    """Normalize a query so calls that differ only in literals group
+    together."""
+    query = _LITERAL.sub("?", query)
+    query = _IN_LIST.sub("IN (?)", query)
+    return " ".join(query.split())
+
+
+class IndexAdvisor:
+    def __init__(self, db_path="users.db"):
+        """
+        Proposes indexes for a recorded workload of (query, params, seconds)
+        records, such as 0-log_queries.captured_queries.
+        """
+        self.db_path = db_path
+        self._stats = {}
+
+    def advise(self, records):
+        """Return Proposals ranked by estimated total seconds saved."""
+        workload = collections.OrderedDict()
+        for query, params, seconds in records:
+            key = fingerprint(query)
+            entry = workload.setdefault(key, [query, params, 0, 0.0])
+            entry[2] += 1
+            entry[3] += seconds
+
+        proposals = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for key, (query, params, calls, total) in workload.items():
+                found = self._propose(conn, query, params, total)
+                if found is None:
+                    continue
+                statement, table, columns, saving = found
+                previous = proposals.get(statement)
+                if previous is None:
+                    proposals[statement] = Proposal(
+                        statement, table, columns, (key,), calls, total, saving)
+                else:
+                    proposals[statement] = previous._replace(
+                        fingerprints=previous.fingerprints + (key,),
+                        calls=previous.calls + calls,
+                        total_time=previous.total_time + total,
+                        estimated_saving=previous.estimated_saving + saving)
+        finally:
+            conn.close()
+        return sorted(proposals.values(),
+                      key=lambda p: p.estimated_saving, reverse=True)
+
+    def validate(self, proposal, query, params=(), repeat=20):
+        """
+        Time `query` on a scratch copy of the database before and after
+        applying `proposal`. users.db itself is never modified.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            scratch_path = os.path.join(tmp, "scratch.db")
+            source = sqlite3.connect(self.db_path)
+            scratch = sqlite3.connect(scratch_path)
+            try:
+                source.backup(scratch)
+                before = self._time(scratch, query, params, repeat)
+                scratch.execute(proposal.statement)
+                scratch.execute("ANALYZE")
+                after = self._time(scratch, query, params, repeat)
+                plan = [row[3] for row in scratch.execute(
+                    "EXPLAIN QUERY PLAN " + query, params)]
+            finally:
+                scratch.close()
+                source.close()
+        index_name = proposal.statement.split()[2]
+        return {
+            "before": before,
+            "after": after,
+            "speedup": before / after if after else float("inf"),
+            "uses_index": any(index_name in detail for detail in plan),
+        }
+
+    def _propose(self, conn, query, params, total):
+        params = self._bind(query, params)
+        try:
+            plan = [row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN " + query, params)]
+        except sqlite3.Error:
+            return None
+        scanned = [m.group(1) for m in map(_FULL_SCAN.match, plan) if m]
+        sorts = any("USE TEMP B-TREE" in detail for detail in plan)
+        # A full scan, or a sort into a temp B-tree after an index search
+        if scanned:
+            table = scanned[0]
+        elif sorts:
+            accessed = [m.group(1) for m in map(_TABLE_ACCESS.match, plan) if m]
+            if not accessed:
+                return None
+            table = accessed[0]
+        else:
+            return None
+        rows, distinct = self._table_stats(conn, table)
+
+        equality, ranged = [], []
+        where = _WHERE.search(query)
+        for column, op in _PREDICATE.findall(where.group(1) if where else ""):
+            op = op.upper()
+            if column not in distinct:
+                continue
+            if op in _EQUALITY and column not in equality:
+                equality.append(column)
+            elif op in _RANGE and column not in ranged:
+                ranged.append(column)
+        order_by = []
+        match = _ORDER_BY.search(query)
+        if match:
+            for term in match.group(1).split(","):
+                column = term.split()[0] if term.split() else ""
+                if column in distinct and column not in order_by:
+                    order_by.append(column)
+
+        # Equality columns first, then at most one range column; the sort
+        # can only come from the index when no range column precedes it.
+        # When the search already uses an index and only the sort is
+        # missing, the ORDER BY columns take the range column's place and
+        # the range is filtered while walking the index in order.
+        sort_only = not scanned
+        if sort_only:
+            columns = equality + [c for c in order_by if c not in equality]
+            if columns == equality:
+                return None
+        else:
+            columns = equality + ranged[:1]
+            if not ranged:
+                columns += [c for c in order_by if c not in columns]
+        if not columns:
+            return None
+
+        # Rough cost model in rows touched: a scan reads every row, an index
+        # seek reads log2(n) pages plus the matching rows. Equality
+        # selectivity comes from distinct counts, a range keeps a quarter.
+        # A sort-only proposal trades sorting the searched rows for
+        # walking every row of its equality prefix in index order.
+        selectivity = 1.0
+        for column in equality:
+            selectivity /= max(self._distinct(conn, table, column), 1)
+        prefix = rows * selectivity
+        if ranged:
+            selectivity *= 0.25
+        matched = rows * selectivity
+        if sort_only:
+            cost_before = (math.log2(rows + 1) + matched +
+                           matched * math.log2(matched + 1))
+            cost_after = math.log2(rows + 1) + prefix
+        else:
+            cost_before = rows + (rows * math.log2(rows + 1) if sorts else 0)
+            cost_after = math.log2(rows + 1) + matched
+            if sorts and (ranged or not order_by):
+                cost_after += matched * math.log2(matched + 1)
+        fraction = max(0.0, 1 - cost_after / cost_before) if cost_before else 0
+        name = f"idx_{table}_{'_'.join(columns)}"
+        statement = f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+        return statement, table, tuple(columns), total * fraction
+
+    def _table_stats(self, conn, table):
+        if table not in self._stats:
+            rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            columns = [row[1] for row in conn.execute(
+                f"PRAGMA table_info({table})")]
+            # Distinct counts are filled in lazily; only filtered columns
+            # need one. Only numbers are kept, never the connection.
+            self._stats[table] = rows, dict.fromkeys(columns)
+        return self._stats[table]
+
+    def _distinct(self, conn, table, column):
+        distinct = self._stats[table][1]
+        if distinct[column] is None:
+            distinct[column] = conn.execute(
+                f"SELECT COUNT(DISTINCT {column}) FROM {table}").fetchone()[0]
+        return distinct[column]
+
+    @staticmethod
+    def _bind(query, params):
+        # EXPLAIN needs every placeholder bound; NULL is fine for planning
+        if params:
+            return params
+        return (None,) * query.count("?")
+
+    @staticmethod
+    def _time(conn, query, params, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(query, params).fetchall()
+        return (time.perf_counter() - started) / repeat
+
+
+if __name__ == "__main__":
+    _log = __import__('0-log_queries')
+
+    #### record a small workload through the log_queries decorator
+    for age in (30, 40, 50, 60):
+        _log.fetch_all_users(query=f"SELECT * FROM users WHERE age > {age} ORDER BY age")
+    for user_id in range(1, 6):
+        _log.fetch_all_users(query=f"SELECT * FROM users WHERE id = {user_id}")
+    _log.fetch_all_users(query="SELECT * FROM users WHERE email = 'Felicia75@gmail.com'")
+
+    advisor = IndexAdvisor()
+    proposals = advisor.advise(_log.captured_queries)
+    for proposal in proposals:
+        print(f"{proposal.estimated_saving * 1e3:8.3f} ms saved  "
+              f"{proposal.calls:3d} calls  {proposal.statement}")
+    if proposals:
+        top = proposals[0]
+        sample = next(q for q, _, _ in _log.captured_queries
+                      if fingerprint(q) in top.fingerprints)
+        print("validated on a scratch copy:", advisor.validate(top, sample))
@@ -1,11 +1,24 @@
 import sqlite3
 import csv
-import uuid
+import time
+import itertools
 from pathlib import Path
 
-def setup_sqlite_db(db_name="users.db", csv_file="users.csv"):
+# Secondary indexes for the `age > ?` and email lookups in the other modules
+INDEXES = {
+    "idx_users_age": "CREATE INDEX idx_users_age ON users (age)",
+    "idx_users_email": "CREATE INDEX idx_users_email ON users (email)",
+}
+
+def setup_sqlite_db(db_name="users.db", csv_file="users.csv", chunk_size=5000):
+    # Read from CSV and insert into users table
+    csv_path = Path(csv_file)
+    if not csv_path.exists():
+        print(f"CSV file {csv_file} not found.")
+        return
+
     # Create/connect to the SQLite database in current directory
-    conn = sqlite3.connect(db_name)
+    conn = sqlite3.connect(db_name, isolation_level=None)
     cursor = conn.cursor()
 
     # Create the users table
@@ -18,27 +31,60 @@ def setup_sqlite_db(db_name="users.db", csv_file="users.csv"):
         );
     ''')
 
-    # Read from CSV and insert into users table
-    csv_path = Path(csv_file)
-    if not csv_path.exists():
-        print(f"CSV file {csv_file} not found.")
-        return
+    # Relax durability for the load only; a crash mid-import just means
+    # running the import again
+    journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+    cursor.execute("PRAGMA journal_mode = MEMORY")
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    # Maintaining indexes row by row is slower than building them once
+    for name in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    started = time.perf_counter()
+    rows_loaded = 0
+    try:
+        with open(csv_file, newline='', encoding='utf-8') as f:
+            # The CSV line number is the row id, so re-importing the same
+            # file updates rows in place instead of duplicating them
+            rows = (
+                (user_id, row['name'], row['email'], int(row['age']))
+                for user_id, row in enumerate(csv.DictReader(f), start=1)
+            )
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                cursor.execute("BEGIN")
+                try:
+                    cursor.executemany('''
+                        INSERT INTO users (id, name, email, age)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT (id) DO UPDATE SET
+                            name = excluded.name,
+                            email = excluded.email,
+                            age = excluded.age
+                    ''', chunk)
+                    cursor.execute("COMMIT")
+                except BaseException:
+                    cursor.execute("ROLLBACK")
+                    raise
+                rows_loaded += len(chunk)
+
+        for sql in INDEXES.values():
+            cursor.execute(sql)
+        cursor.execute("ANALYZE")
+    finally:
+        cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {synchronous}")
+        conn.close()
 
-    with open(csv_file, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = row['name']
-            email = row['email']
-            age = int(row['age'])
-
-            cursor.execute('''
-                INSERT INTO users (name, email, age)
-                VALUES (?, ?, ?)
-            ''', (name, email, age))
-
-    conn.commit()
-    conn.close()
-    print(f"Database {db_name} created and populated successfully.")
+    elapsed = time.perf_counter() - started
+    print(f"Database {db_name} created and populated successfully: "
+          f"{rows_loaded} rows in {elapsed:.3f}s "
+          f"({rows_loaded / elapsed:,.0f} rows/sec).")
+    return rows_loaded
 
 # Run it
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the coalescing in `4-cache_query.py`.
+"""
+import asyncio
+import unittest
+
+_cache = __import__('4-cache_query')
+
+
+class TestAsyncCoalescing(unittest.IsolatedAsyncioTestCase):
+    """
+    Concurrent async misses share one leader; cancelling any one of the
+    callers must not fail the others.
+    """
+    def setUp(self):
+        """Fresh cache and a query that blocks until `gate` is set."""
+        _cache.query_cache.clear()
+        _cache._cached_at.clear()
+        self.gate = asyncio.Event()
+        self.calls = 0
+
+        @_cache.cache_query
+        async def fetch(conn, query):
+            self.calls += 1
+            await self.gate.wait()
+            return [("rows", query)]
+        self.fetch = fetch
+
+    async def start(self, n):
+        """Start `n` callers of the same query; the first one leads."""
+        tasks = []
+        for _ in range(n):
+            tasks.append(asyncio.create_task(
+                self.fetch(None, query="SELECT * FROM users")))
+            await asyncio.sleep(0)
+        return tasks
+
+    async def test_waiter_cancelled(self):
+        """A cancelled waiter leaves the leader and other waiters alone."""
+        leader, cancelled, waiter = await self.start(3)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        self.gate.set()
+        expected = [("rows", "SELECT * FROM users")]
+        self.assertEqual(await leader, expected)
+        self.assertEqual(await waiter, expected)
+        with self.assertRaises(asyncio.CancelledError):
+            await cancelled
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(_cache._inflight, {})
+
+    async def test_leader_cancelled(self):
+        """A cancelled leader hands the query to one of its waiters."""
+        leader, first, second = await self.start(3)
+        leader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0)
+        self.gate.set()
+        expected = [("rows", "SELECT * FROM users")]
+        self.assertEqual(await first, expected)
+        self.assertEqual(await second, expected)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(_cache._inflight, {})
+
+
+if __name__ == "__main__":
+    unittest.main()